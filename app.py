@@ -6,16 +6,20 @@ Run with: streamlit run app.py
 from __future__ import annotations
 
 import datetime
+import functools
+import hashlib
 import tempfile
+import time
 import os
+import string
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 from streamlit_cookies_controller import CookieController
 
-from invoice_generator import generate_invoice
-from utils import ai_autofill, calculate_totals, compute_item_amount, convert_to_words, generate_utr, generate_invoice_number
+from utils import ai_autofill, calculate_totals_arrays, compute_item_amount, convert_to_words, generate_utr, generate_invoice_number
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Page config
@@ -30,8 +34,7 @@ st.set_page_config(
 # ─────────────────────────────────────────────────────────────────────────────
 # Custom CSS – premium dark-mode look
 # ─────────────────────────────────────────────────────────────────────────────
-st.markdown(
-    """
+CUSTOM_CSS = """
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
 
@@ -151,17 +154,45 @@ textarea {
     background-clip: text;
 }
 </style>
-""",
-    unsafe_allow_html=True,
-)
+"""
+
+# Streamlit clears any element not re-emitted during a rerun, so the style
+# block must be sent on every run; only the string itself is built once.
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Summary card markup, filled in by the totals section
+_TOTALS_TPL = string.Template("""
+<div class="totals-card">
+    <div class="totals-row"><span>Subtotal</span><span>₹ $subtotal</span></div>
+    <div class="totals-row"><span>CGST @ $cgst_pct%</span><span>₹ $cgst</span></div>
+    <div class="totals-row"><span>SGST @ $sgst_pct%</span><span>₹ $sgst</span></div>
+    <div class="totals-row"><span>Service Charge @ $service_charge_pct%</span><span>₹ $service_charge</span></div>
+    <div class="totals-row grand"><span>GRAND TOTAL</span><span>₹ $grand_total</span></div>
+</div>
+""")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Session state defaults
 # ─────────────────────────────────────────────────────────────────────────────
+# Characters rewritten when building the download file name
+_SAFE_FILENAME = str.maketrans({" ": "_", "/": "-"})
+
 CATEGORIES = ["Product", "Service", "Subscription", "Consultation", "Labor", "Hardware", "Software", "Food", "Other"]
 
-def _default_items() -> list[dict]:
+
+def _as_category(values) -> pd.Categorical:
+    """
+    Store the category column as pandas Categorical (int codes, not one str per row).
+    Labels outside CATEGORIES (e.g. from AI autofill) are kept as extra categories.
+    """
+    values = pd.Series(values, dtype="object")
+    extra = sorted(set(values.dropna()) - set(CATEGORIES))
+    return pd.Categorical(values, categories=CATEGORIES + extra)
+
+
+@st.cache_data(show_spinner=False)
+def _default_df() -> pd.DataFrame:
     """Return a generic sample order as default rows (fully editable)."""
     raw = [
         # date,       description,                  qty,  unit_price, gst_pct,  category
@@ -171,31 +202,23 @@ def _default_items() -> list[dict]:
         ("16 Oct", "Network Router (AC3200)",          2,  3500.0, 18.0, "Hardware"),
         ("18 Oct", "Monthly Maintenance Subscription", 1,  2500.0, 18.0, "Subscription"),
     ]
-    return [
+    dates, descs, qtys, unit_prices, gst_pcts, categories = zip(*raw)
+    df = pd.DataFrame(
         {
-            "date": date,
-            "category": category,
-            "description": desc,
-            "qty": float(qty),
-            "unit_price": float(unit_price),
-            "gst_pct": float(gst_pct),
-            "amount": compute_item_amount(float(qty), float(unit_price), float(gst_pct)),
+            "date": dates,
+            "category": _as_category(categories),
+            "description": descs,
+            "qty": np.array(qtys, dtype=float),
+            "unit_price": np.array(unit_prices, dtype=float),
+            "gst_pct": np.array(gst_pcts, dtype=float),
         }
-        for date, desc, qty, unit_price, gst_pct, category in raw
-    ]
+    )
+    df["amount"] = compute_item_amount(df["qty"], df["unit_price"], df["gst_pct"])
+    return df
 
 
 if "items_df" not in st.session_state:
-    st.session_state.items_df = pd.DataFrame(_default_items())
-
-if "pdf_bytes" not in st.session_state:
-    st.session_state.pdf_bytes = None
-
-if "logo_path" not in st.session_state:
-    st.session_state.logo_path = None
-
-if "ai_message" not in st.session_state:
-    st.session_state.ai_message = ""
+    st.session_state.items_df = _default_df()
 
 if "utr_code" not in st.session_state:
     st.session_state.utr_code = generate_utr()
@@ -203,22 +226,24 @@ if "utr_code" not in st.session_state:
 if "invoice_number" not in st.session_state:
     st.session_state.invoice_number = generate_invoice_number()
 
-# Defaults for business inputs to be managed by session_state
-defaults = {
-    "business_name": "",
-    "business_address": "",
-    "business_phone": "",
-    "business_gstin": "",
-    "business_reg_no": "",
-    "handled_by": "",
-    "staff_id": "",
-    "theme_accent": "#E8650A",
-    "theme_header": "#1A1A2E",
-    "theme_footer": "#1A1A2E",
-}
-for k, v in defaults.items():
-    if k not in st.session_state:
-        st.session_state[k] = v
+# Static defaults (business inputs etc.) managed by session_state
+SESSION_DEFAULTS = (
+    ("pdf_bytes", None),
+    ("logo_path", None),
+    ("ai_message", ""),
+    ("business_name", ""),
+    ("business_address", ""),
+    ("business_phone", ""),
+    ("business_gstin", ""),
+    ("business_reg_no", ""),
+    ("handled_by", ""),
+    ("staff_id", ""),
+    ("theme_accent", "#E8650A"),
+    ("theme_header", "#1A1A2E"),
+    ("theme_footer", "#1A1A2E"),
+)
+for k, v in SESSION_DEFAULTS:
+    st.session_state.setdefault(k, v)
 
 cookie_controller = CookieController()
 
@@ -227,21 +252,134 @@ cookie_controller = CookieController()
 # Helpers
 # ─────────────────────────────────────────────────────────────────────────────
 def _refresh_amounts(df: pd.DataFrame) -> pd.DataFrame:
-    """Recompute the 'amount' column based on qty, unit_price, gst_pct."""
-    df = df.copy()
-    df["amount"] = df.apply(
-        lambda r: compute_item_amount(
-            float(r.get("qty", 0) or 0),
-            float(r.get("unit_price", 0) or 0),
-            float(r.get("gst_pct", 0) or 0),
-        ),
-        axis=1,
-    )
+    """
+    Recompute the 'amount' column based on qty, unit_price, gst_pct.
+    Updates `df` in place (st.data_editor already hands back its own copy).
+    """
+    qty = _numeric_column(df, "qty")
+    unit_price = _numeric_column(df, "unit_price")
+    gst_pct = _numeric_column(df, "gst_pct")
+    df["amount"] = compute_item_amount(qty, unit_price, gst_pct)
+    return df
+
+
+ITEM_COLUMNS = ("date", "category", "description", "qty", "unit_price", "gst_pct", "amount")
+
+
+def _items_frame(records: list[dict]) -> pd.DataFrame:
+    """Build an items DataFrame with the editor's fixed column order and dtypes."""
+    df = _coerce_numeric(pd.DataFrame(records).reindex(columns=list(ITEM_COLUMNS)))
+    df["category"] = _as_category(df["category"])
     return df
 
 
-def _items_to_dicts(df: pd.DataFrame) -> list[dict]:
-    return df.to_dict(orient="records")
+def _coerce_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Force the numeric item columns to float64 in place (bad / blank cells become NaN)."""
+    for col in ("qty", "unit_price", "gst_pct", "amount"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
+
+
+def _items_fingerprint(df: pd.DataFrame) -> int:
+    """Cheap content hash of the columns that feed 'amount'."""
+    cols = df[["qty", "unit_price", "gst_pct"]]
+    return hash(pd.util.hash_pandas_object(cols, index=False).to_numpy().tobytes())
+
+
+def _numeric_column(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Return a column as a float array, treating blanks / bad input as 0."""
+    return pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+
+def _totals_fast(
+    df: pd.DataFrame, cgst_pct: float, sgst_pct: float, service_charge_pct: float
+) -> dict[str, float]:
+    """calculate_totals() straight from the DataFrame columns, without building row dicts."""
+    # Not cached: hashing the columns for st.cache_data costs more than the math
+    return calculate_totals_arrays(
+        _numeric_column(df, "qty"),
+        _numeric_column(df, "unit_price"),
+        _numeric_column(df, "gst_pct"),
+        cgst_pct,
+        sgst_pct,
+        service_charge_pct,
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _persist_logo(data: bytes, suffix: str) -> str:
+    """Write the uploaded logo to a temp file once per distinct image; return its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(data)
+    return tmp.name
+
+
+# Disk-persisted caches ignore ttl=, so the hour goes into the key instead
+_AI_CACHE_SECONDS = 3600
+
+
+class _UncachedResult(Exception):
+    """Raised out of _cached_ai_autofill() so Streamlit doesn't store `result`."""
+
+    def __init__(self, result: dict):
+        super().__init__("degraded AI autofill result")
+        self.result = result
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=256)
+def _cached_ai_autofill(
+    prompt: str, base_url: str, key_hash: str, hour: int, _api_key: str, _tavily_api_key: str
+) -> dict:
+    """
+    ai_autofill() memoized on the prompt, endpoint, a digest of both keys and
+    the current hour. Underscore-prefixed args are skipped by Streamlit's
+    hasher, so raw keys never become part of the cache key. Persisted to
+    disk so a retried prompt is answered locally even after the server
+    restarts; degraded results (failed search, repaired JSON) are not kept.
+    """
+    result = ai_autofill(prompt, _api_key, _tavily_api_key, base_url)
+    if result.get("degraded"):
+        raise _UncachedResult(result)
+    return result
+
+
+def _ai_autofill(prompt: str, base_url: str, api_key: str, tavily_api_key: str) -> dict:
+    """_cached_ai_autofill() with the key digest and hour filled in."""
+    try:
+        return _cached_ai_autofill(
+            prompt,
+            base_url,
+            _key_digest(api_key, tavily_api_key),
+            int(time.time() // _AI_CACHE_SECONDS),
+            api_key,
+            tavily_api_key,
+        )
+    except _UncachedResult as exc:
+        return exc.result
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_date(text: str, today: datetime.date) -> datetime.date | None:
+    """
+    Parse a free-form AI date string. `today` is part of the cache key so
+    relative phrases ("yesterday") don't go stale across midnight.
+    dateparser is heavy, so it's imported on first use only.
+    """
+    try:
+        import dateparser
+    except ImportError:
+        return None
+    parsed = dateparser.parse(text)
+    return parsed.date() if parsed else None
+
+
+def _key_digest(*keys: str) -> str:
+    return hashlib.sha256("\0".join(keys).encode()).hexdigest()
+
+
+def _items_to_columns(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Columnar items payload for generate_invoice() – no per-row dicts."""
+    return {c: df[c].to_numpy() for c in df.columns}
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -254,25 +392,26 @@ with st.sidebar:
 
     st.markdown('<div class="section-header">🏢 Business Details</div>', unsafe_allow_html=True)
 
-    business_name = st.text_input("Business Name", value=st.session_state.business_name)
-    address = st.text_input("Address", value=st.session_state.business_address)
-    phone = st.text_input("Phone", value=st.session_state.business_phone)
-    gstin = st.text_input("GSTIN / Tax ID", value=st.session_state.business_gstin)
-    reg_no = st.text_input("Registration No.", value=st.session_state.business_reg_no)
+    # A form batches the five fields into one rerun on Save instead of one per edit
+    with st.form("business_form", border=False):
+        business_name = st.text_input("Business Name", value=st.session_state.business_name)
+        address = st.text_input("Address", value=st.session_state.business_address)
+        phone = st.text_input("Phone", value=st.session_state.business_phone)
+        gstin = st.text_input("GSTIN / Tax ID", value=st.session_state.business_gstin)
+        reg_no = st.text_input("Registration No.", value=st.session_state.business_reg_no)
+        business_saved = st.form_submit_button("💾 Save Business Details", use_container_width=True)
 
     # Sync manual edits back to session state so they persist across reruns
-    st.session_state.business_name = business_name
-    st.session_state.business_address = address
-    st.session_state.business_phone = phone
-    st.session_state.business_gstin = gstin
-    st.session_state.business_reg_no = reg_no
+    if business_saved:
+        st.session_state.business_name = business_name
+        st.session_state.business_address = address
+        st.session_state.business_phone = phone
+        st.session_state.business_gstin = gstin
+        st.session_state.business_reg_no = reg_no
 
     logo_file = st.file_uploader("Upload Logo (PNG / JPG)", type=["png", "jpg", "jpeg"])
     if logo_file:
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=Path(logo_file.name).suffix)
-        tmp.write(logo_file.read())
-        tmp.flush()
-        st.session_state.logo_path = tmp.name
+        st.session_state.logo_path = _persist_logo(logo_file.getvalue(), Path(logo_file.name).suffix)
         st.image(logo_file, width=80)
     else:
         st.session_state.logo_path = None
@@ -342,13 +481,12 @@ with st.expander("🤖 AI Autofill – Describe your order in plain English", ex
         else:
             with st.spinner("Asking AI to parse your order…"):
                 try:
-                    ai_result = ai_autofill(ai_prompt, openai_api_key, tavily_api_key, openai_base_url)
+                    ai_result = _ai_autofill(ai_prompt, openai_base_url, openai_api_key, tavily_api_key)
                     
                     # Update items
                     ai_items = ai_result.get("items", [])
                     if ai_items:
-                        new_df = pd.DataFrame(ai_items)
-                        st.session_state.items_df = new_df
+                        st.session_state.items_df = _items_frame(ai_items)
                         
                     # Update business details
                     bus_info = ai_result.get("business", {})
@@ -368,10 +506,9 @@ with st.expander("🤖 AI Autofill – Describe your order in plain English", ex
                     # Update Invoice Date manually if provided
                     extracted_date = ai_result.get("invoice_date", "Today")
                     if extracted_date and str(extracted_date).lower() != "today":
-                        import dateparser
-                        parsed = dateparser.parse(str(extracted_date))
+                        parsed = _parse_date(str(extracted_date), datetime.date.today())
                         if parsed:
-                            st.session_state.invoice_date = parsed.date()
+                            st.session_state.invoice_date = parsed
 
                     st.session_state.ai_message = f"✅ {len(ai_items)} item(s) added and details updated from AI."
                     st.rerun()
@@ -385,7 +522,7 @@ with st.expander("🤖 AI Autofill – Describe your order in plain English", ex
 st.divider()
 
 # ── Invoice & Customer Details ─────────────────────────────────   ───────────────
-col_inv, col_cust, col_staff = st.columns(3)
+col_inv, col_people = st.columns([1, 2])
 
 with col_inv:
     st.markdown('<div class="section-header">📄 Invoice Details</div>', unsafe_allow_html=True)
@@ -407,128 +544,154 @@ with col_inv:
     
     visit_period = st.text_input("Service / Project Period", value="", placeholder="e.g. 27 Jan – 29 Jan 2026")
 
-with col_cust:
-    st.markdown('<div class="section-header">👤 Customer Details</div>', unsafe_allow_html=True)
-    customer_name = st.text_input("Customer Name", value="Walk-in Client")
-    customer_ref = st.text_input("Customer/Project Ref", value="REF-01")
-    customer_qty = st.number_input("Customer Qty / Pax", min_value=1, value=1, step=1)
+# Customer + staff fields are batched in a form so typing doesn't rerun the page per keystroke
+with col_people:
+    with st.form("party_form", border=False):
+        col_cust, col_staff = st.columns(2)
+
+        with col_cust:
+            st.markdown('<div class="section-header">👤 Customer Details</div>', unsafe_allow_html=True)
+            customer_name = st.text_input("Customer Name", value="Walk-in Client")
+            customer_ref = st.text_input("Customer/Project Ref", value="REF-01")
+            customer_qty = st.number_input("Customer Qty / Pax", min_value=1, value=1, step=1)
+
+        with col_staff:
+            st.markdown('<div class="section-header">👨‍💼 Staff/Agent Details</div>', unsafe_allow_html=True)
+            handled_by = st.text_input("Handled By", value=st.session_state.handled_by)
+            staff_id = st.text_input("Staff/Agent ID", value=st.session_state.staff_id)
+
+        st.form_submit_button("✔ Update Details", use_container_width=True)
 
-with col_staff:
-    st.markdown('<div class="section-header">👨‍💼 Staff/Agent Details</div>', unsafe_allow_html=True)
-    handled_by = st.text_input("Handled By", value=st.session_state.handled_by)
-    staff_id = st.text_input("Staff/Agent ID", value=st.session_state.staff_id)
-    
     st.session_state.handled_by = handled_by
     st.session_state.staff_id = staff_id
-    
-    st.write("")  # spacer
 
 st.divider()
 
-# ── Items Table ───────────────────────────────────────────────────────────────
-_hdr_col, _reset_col, _clear_col = st.columns([4, 1, 1])
-with _hdr_col:
-    st.markdown('<div class="section-header">📦 Invoice Items</div>', unsafe_allow_html=True)
-with _reset_col:
-    if st.button("↺ Reset to Sample", use_container_width=True, help="Restore the original sample order"):
-        st.session_state.items_df = pd.DataFrame(_default_items())
-        st.rerun()
-with _clear_col:
-    if st.button("🗑 Clear All", use_container_width=True, help="Remove all rows and start with a blank table"):
-        st.session_state.items_df = pd.DataFrame([{
-            "date": datetime.date.today().strftime("%d %b"),
-            "category": "Service",
-            "description": "",
-            "qty": 1.0,
-            "unit_price": 0.0,
-            "gst_pct": 5.0,
-            "amount": 0.0,
-        }])
-        st.rerun()
-
-edited_df = st.data_editor(
-    st.session_state.items_df,
-    num_rows="dynamic",
-    use_container_width=True,
-    hide_index=True,
-    column_config={
-        "date": st.column_config.TextColumn("Date", width="small"),
-        "category": st.column_config.SelectboxColumn(
-            "Category",
-            options=CATEGORIES,
-            default="Service",
-            width="small",
-            required=True,
-        ),
-        "description": st.column_config.TextColumn("Item Description", width="large"),
-        "qty": st.column_config.NumberColumn("Qty", min_value=0, step=0.5, format="%.2f", width="small"),
-        "unit_price": st.column_config.NumberColumn(
-            "Unit Price (₹)", min_value=0, format="%.2f", width="small"
-        ),
-        "gst_pct": st.column_config.NumberColumn(
-            "GST %", min_value=0, max_value=100, step=0.5, format="%.1f", width="small"
-        ),
-        "amount": st.column_config.NumberColumn(
-            "Amount (₹)", disabled=True, format="%.2f", width="small"
-        ),
-    },
-    key="items_editor",
-)
+# Items table + charges/summary run as one fragment: editing a cell or a rate
+# reruns only this block instead of the whole page.
+@st.fragment
+def _items_and_totals() -> tuple[pd.DataFrame, dict, str, str]:
+    # ── Items Table ───────────────────────────────────────────────────────────
+    _hdr_col, _reset_col, _clear_col = st.columns([4, 1, 1])
+    with _hdr_col:
+        st.markdown('<div class="section-header">📦 Invoice Items</div>', unsafe_allow_html=True)
+    with _reset_col:
+        if st.button("↺ Reset to Sample", use_container_width=True, help="Restore the original sample order"):
+            st.session_state.items_df = _default_df()
+            st.rerun()
+    with _clear_col:
+        if st.button("🗑 Clear All", use_container_width=True, help="Remove all rows and start with a blank table"):
+            st.session_state.items_df = _items_frame([{
+                "date": datetime.date.today().strftime("%d %b"),
+                "category": "Service",
+                "description": "",
+                "qty": 1.0,
+                "unit_price": 0.0,
+                "gst_pct": 5.0,
+                "amount": 0.0,
+            }])
+            st.rerun()
+
+    edited_df = st.data_editor(
+        st.session_state.items_df,
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "date": st.column_config.TextColumn("Date", width="small"),
+            "category": st.column_config.SelectboxColumn(
+                "Category",
+                options=CATEGORIES,
+                default="Service",
+                width="small",
+                required=True,
+            ),
+            "description": st.column_config.TextColumn("Item Description", width="large"),
+            "qty": st.column_config.NumberColumn("Qty", min_value=0, step=0.5, format="%.2f", width="small"),
+            "unit_price": st.column_config.NumberColumn(
+                "Unit Price (₹)", min_value=0, format="%.2f", width="small"
+            ),
+            "gst_pct": st.column_config.NumberColumn(
+                "GST %", min_value=0, max_value=100, step=0.5, format="%.1f", width="small"
+            ),
+            "amount": st.column_config.NumberColumn(
+                "Amount (₹)", disabled=True, format="%.2f", width="small"
+            ),
+        },
+        key="items_editor",
+    )
+    # Blank / mixed cells can leave object columns; pin float64 so the math below stays vectorized
+    edited_df = _coerce_numeric(edited_df)
 
-# Recompute amounts whenever user edits
-edited_df = _refresh_amounts(edited_df)
-st.session_state.items_df = edited_df
+    # Recompute amounts only when qty / price / GST actually changed
+    items_fp = _items_fingerprint(edited_df)
+    if items_fp != st.session_state.get("items_fp"):
+        edited_df = _refresh_amounts(edited_df)
+        st.session_state.items_fp = items_fp
+    edited_df["category"] = _as_category(edited_df["category"])
+    st.session_state.items_df = edited_df
 
-st.divider()
+    st.divider()
 
-# ── Tax / Charges & Payment ───────────────────────────────────────────────────
-col_tax, col_pay, col_totals = st.columns([1, 1, 1.2])
+    # ── Tax / Charges & Payment ───────────────────────────────────────────────
+    col_tax, col_pay, col_totals = st.columns([1, 1, 1.2])
+
+    with col_tax:
+        st.markdown('<div class="section-header">🧮 Tax & Charges</div>', unsafe_allow_html=True)
+        with st.form("tax_form", border=False):
+            cgst_pct = st.number_input("CGST %", min_value=0.0, max_value=50.0, value=2.5, step=0.5, format="%.2f")
+            sgst_pct = st.number_input("SGST %", min_value=0.0, max_value=50.0, value=2.5, step=0.5, format="%.2f")
+            service_charge_pct = st.number_input(
+                "Service Charge %", min_value=0.0, max_value=50.0, value=5.0, step=0.5, format="%.2f"
+            )
+            st.form_submit_button("✔ Apply Rates", use_container_width=True)
+
+    with col_pay:
+        st.markdown('<div class="section-header">💳 Payment Details</div>', unsafe_allow_html=True)
+        payment_mode = st.selectbox(
+            "Payment Mode",
+            ["Cash", "UPI", "Card", "Net Banking", "Cheque", "Other"],
+            index=1,
+        )
 
-with col_tax:
-    st.markdown('<div class="section-header">🧮 Tax & Charges</div>', unsafe_allow_html=True)
-    cgst_pct = st.number_input("CGST %", min_value=0.0, max_value=50.0, value=2.5, step=0.5, format="%.2f")
-    sgst_pct = st.number_input("SGST %", min_value=0.0, max_value=50.0, value=2.5, step=0.5, format="%.2f")
-    service_charge_pct = st.number_input(
-        "Service Charge %", min_value=0.0, max_value=50.0, value=5.0, step=0.5, format="%.2f"
-    )
+        # Auto UTR Generation Code Layout
+        u_col1, u_col2 = st.columns([5, 1])
+        with u_col1:
+             payment_ref = st.text_input("Payment Reference / UTR", value=st.session_state.utr_code)
+             st.session_state.utr_code = payment_ref
+        with u_col2:
+             st.markdown("<br>", unsafe_allow_html=True) # alignment spacer
+             if st.button("🔄", help="Generate new UTR code", use_container_width=True):
+                 st.session_state.utr_code = generate_utr()
+                 st.rerun()
+
+    # Compute totals
+    totals = _totals_fast(edited_df, cgst_pct, sgst_pct, service_charge_pct)
+
+    with col_totals:
+        st.markdown('<div class="section-header">💰 Summary</div>', unsafe_allow_html=True)
+        totals_key = (
+            totals["subtotal"], totals["cgst"], totals["sgst"], totals["service_charge"],
+            totals["grand_total"], cgst_pct, sgst_pct, service_charge_pct,
+        )
+        if st.session_state.get("totals_key") != totals_key:
+            st.session_state.totals_html = _TOTALS_TPL.substitute(
+                subtotal=f"{totals['subtotal']:,.2f}",
+                cgst_pct=cgst_pct,
+                cgst=f"{totals['cgst']:,.2f}",
+                sgst_pct=sgst_pct,
+                sgst=f"{totals['sgst']:,.2f}",
+                service_charge_pct=service_charge_pct,
+                service_charge=f"{totals['service_charge']:,.2f}",
+                grand_total=f"{totals['grand_total']:,.2f}",
+            )
+            st.session_state.totals_key = totals_key
+        st.markdown(st.session_state.totals_html, unsafe_allow_html=True)
 
-with col_pay:
-    st.markdown('<div class="section-header">💳 Payment Details</div>', unsafe_allow_html=True)
-    payment_mode = st.selectbox(
-        "Payment Mode",
-        ["Cash", "UPI", "Card", "Net Banking", "Cheque", "Other"],
-        index=1,
-    )
-    
-    # Auto UTR Generation Code Layout
-    u_col1, u_col2 = st.columns([5, 1])
-    with u_col1:
-         payment_ref = st.text_input("Payment Reference / UTR", value=st.session_state.utr_code)
-         st.session_state.utr_code = payment_ref
-    with u_col2:
-         st.markdown("<br>", unsafe_allow_html=True) # alignment spacer
-         if st.button("🔄", help="Generate new UTR code", use_container_width=True):
-             st.session_state.utr_code = generate_utr()
-             st.rerun()
+    return edited_df, totals, payment_mode, payment_ref
 
-# Compute totals
-items_list = _items_to_dicts(edited_df)
-totals = calculate_totals(items_list, cgst_pct, sgst_pct, service_charge_pct)
 
-with col_totals:
-    st.markdown('<div class="section-header">💰 Summary</div>', unsafe_allow_html=True)
-    st.markdown(
-        f"""
-        <div class="totals-card">
-            <div class="totals-row"><span>Subtotal</span><span>₹ {totals['subtotal']:,.2f}</span></div>
-            <div class="totals-row"><span>CGST @ {cgst_pct}%</span><span>₹ {totals['cgst']:,.2f}</span></div>
-            <div class="totals-row"><span>SGST @ {sgst_pct}%</span><span>₹ {totals['sgst']:,.2f}</span></div>
-            <div class="totals-row"><span>Service Charge @ {service_charge_pct}%</span><span>₹ {totals['service_charge']:,.2f}</span></div>
-            <div class="totals-row grand"><span>GRAND TOTAL</span><span>₹ {totals['grand_total']:,.2f}</span></div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+edited_df, totals, payment_mode, payment_ref = _items_and_totals()
 
 st.divider()
 
@@ -538,6 +701,7 @@ gen_col, dl_col = st.columns([1, 1])
 with gen_col:
     if st.button("🧾 Generate Invoice", use_container_width=True):
         with st.spinner("Generating professional PDF…"):
+            items_cols = _items_to_columns(edited_df)
             invoice_data = {
                 # Business
                 "business_name": business_name,
@@ -564,7 +728,7 @@ with gen_col:
                 "handled_by": handled_by,
                 "staff_id": staff_id,
                 # Items & Totals
-                "items": items_list,
+                "items": items_cols,
                 "totals": totals,
                 # Payment
                 "payment_mode": payment_mode,
@@ -573,6 +737,9 @@ with gen_col:
                 "amount_in_words": convert_to_words(totals["grand_total"]),
             }
             try:
+                # ReportLab is only needed here; keep it off the cold-start path
+                from invoice_generator import generate_invoice
+
                 pdf_bytes = generate_invoice(invoice_data)
                 st.session_state.pdf_bytes = pdf_bytes
                 st.success("✅ Invoice generated successfully!")
@@ -581,10 +748,7 @@ with gen_col:
 
 with dl_col:
     if st.session_state.pdf_bytes:
-        safe_name = (
-            invoice_number.replace(" ", "_").replace("/", "-")
-            + f"_{business_name.replace(' ', '_')}.pdf"
-        )
+        safe_name = f"{invoice_number.translate(_SAFE_FILENAME)}_{business_name.translate(_SAFE_FILENAME)}.pdf"
         st.download_button(
             label="⬇️  Download PDF Invoice",
             data=st.session_state.pdf_bytes,
@@ -2,24 +2,19 @@
 
 from __future__ import annotations
 
+import functools
 import io
+import threading
 from typing import Any
 
 from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import mm
-from reportlab.pdfbase import pdfmetrics
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
-from reportlab.platypus import (
-    HRFlowable,
-    Paragraph,
-    SimpleDocTemplate,
-    Spacer,
-    Table,
-    TableStyle,
-)
+from reportlab.platypus import Table, TableStyle
+
+from utils import to_float
 
 # ── Brand colors (matching original script) ──────────────────────────────────
 BRAND_ORANGE = colors.HexColor("#E8650A")
@@ -30,6 +25,14 @@ TEXT_MUTED = colors.HexColor("#777777")
 TEXT_BODY = colors.HexColor("#2D2D2D")
 WHITE = colors.white
 
+# ── Fixed tints (built once, not per call / per row) ─────────────────────────
+SECTION_TINT = colors.HexColor("#FFF3E6")
+ZEBRA_TINT = colors.HexColor("#FAFAF7")
+FOOTER_TEXT = colors.HexColor("#AAAAAA")
+FOOTER_PAGE_TEXT = colors.HexColor("#666666")
+STAMP_BG = colors.HexColor("#ffffff")
+STAMP_TEXT = colors.HexColor("#000000")
+
 def _get_theme(data: dict) -> dict:
     if "_theme" in data:
         return data["_theme"]
@@ -43,6 +46,14 @@ def _get_theme(data: dict) -> dict:
 
 W, H = A4  # 595.27 × 841.89 pts
 
+# ── Page layout (fixed for A4, so folded once here) ──────────────────────────
+_MARGIN   = 18 * mm
+_FOOTER_H = 16 * mm                       # dark footer bar height
+_MIN_GAP  =  4 * mm                       # minimum whitespace kept before every page break
+_TOTALS_H = 62 * mm                       # space needed for totals + payment stamp on last page
+_CONT_TOP   = H - 14 * mm - 3 * mm        # just below continuation header stripe
+_CONT_AVAIL = _CONT_TOP - _FOOTER_H - _MIN_GAP
+
 
 # ── Internal drawing helpers ─────────────────────────────────────────────────
 
@@ -59,15 +70,14 @@ def _draw_header(c: canvas.Canvas, width: float, height: float, data: dict) -> N
     """Draw the white header bar with logo, restaurant info and INVOICE label."""
     theme = _get_theme(data)
     accent = theme["accent"]
-    margin = 18 * mm
 
     # White header rectangle
     c.setFillColor(WHITE)
     c.rect(0, height - 52 * mm, width, 52 * mm, fill=1, stroke=0)
 
     # Logo: uploaded image or orange circle fallback
-    cx, cy = margin + 12 * mm, height - 26 * mm
-    logo_path: str | None = data.get("logo_path")
+    cx, cy = _MARGIN + 12 * mm, height - 26 * mm
+    logo_path: str | ImageReader | None = data.get("logo_path")
     if logo_path:
         try:
             logo_size = 22 * mm
@@ -94,13 +104,13 @@ def _draw_header(c: canvas.Canvas, width: float, height: float, data: dict) -> N
     # Business name – dark on white
     c.setFillColor(BRAND_DARK)
     c.setFont("Helvetica-Bold", 18)
-    c.drawString(margin + 26 * mm, height - 19 * mm, data.get("business_name", ""))
+    c.drawString(_MARGIN + 26 * mm, height - 19 * mm, data.get("business_name", ""))
 
     c.setFont("Helvetica", 8.5)
     c.setFillColor(TEXT_MUTED)
-    c.drawString(margin + 26 * mm, height - 27 * mm, data.get("address", ""))
+    c.drawString(_MARGIN + 26 * mm, height - 27 * mm, data.get("address", ""))
     c.drawString(
-        margin + 26 * mm,
+        _MARGIN + 26 * mm,
         height - 34 * mm,
         f"Ph: {data.get('phone', '')}  |  Tax ID/GSTIN: {data.get('gstin', '')}  |  Reg No: {data.get('reg_no', '')}",
     )
@@ -108,10 +118,10 @@ def _draw_header(c: canvas.Canvas, width: float, height: float, data: dict) -> N
     # INVOICE label (right side) – orange stays, subtitle goes dark-muted
     c.setFillColor(accent)
     c.setFont("Helvetica-Bold", 22)
-    c.drawRightString(width - margin, height - 20 * mm, "INVOICE")
+    c.drawRightString(width - _MARGIN, height - 20 * mm, "INVOICE")
     c.setFillColor(TEXT_MUTED)
     c.setFont("Helvetica", 8.5)
-    c.drawRightString(width - margin, height - 28 * mm, "Tax Invoice (GSTIN)")
+    c.drawRightString(width - _MARGIN, height - 28 * mm, "Tax Invoice (GSTIN)")
 
     # Orange divider stripe
     c.setFillColor(accent)
@@ -120,14 +130,13 @@ def _draw_header(c: canvas.Canvas, width: float, height: float, data: dict) -> N
 
 def _draw_meta_box(c: canvas.Canvas, width: float, height: float, data: dict) -> None:
     """Draw the gray invoice-meta info box."""
-    margin = 18 * mm
     box_y = height - 57 * mm
     c.setFillColor(BRAND_GRAY)
-    c.roundRect(margin, box_y, width - 2 * margin, 13 * mm, 3, fill=1, stroke=0)
+    c.roundRect(_MARGIN, box_y, width - 2 * _MARGIN, 13 * mm, 3, fill=1, stroke=0)
 
-    col1 = margin + 5 * mm
-    col2 = margin + (width - 2 * margin) * 0.33
-    col3 = margin + (width - 2 * margin) * 0.62
+    col1 = _MARGIN + 5 * mm
+    col2 = _MARGIN + (width - 2 * _MARGIN) * 0.33
+    col3 = _MARGIN + (width - 2 * _MARGIN) * 0.62
 
     _meta_pair(c, col1, box_y, "INVOICE NUMBER", data.get("invoice_number", ""))
     _meta_pair(c, col2, box_y, "INVOICE DATE", data.get("invoice_date", ""))
@@ -136,23 +145,22 @@ def _draw_meta_box(c: canvas.Canvas, width: float, height: float, data: dict) ->
 
 def _draw_billing_info(c: canvas.Canvas, width: float, height: float, data: dict) -> float:
     """Draw billed-to / served-by block. Returns the y of the separator line."""
-    margin = 18 * mm
     bill_y = height - 77 * mm
 
     # Left – client info
     c.setFillColor(BRAND_DARK)
     c.setFont("Helvetica-Bold", 9)
-    c.drawString(margin, bill_y + 3 * mm, "BILLED TO")
+    c.drawString(_MARGIN, bill_y + 3 * mm, "BILLED TO")
     c.setFillColor(TEXT_BODY)
     c.setFont("Helvetica", 9)
     guest_label = data.get("customer_name", "Walk-in Client")
     covers = data.get("customer_qty", "")
     if covers:
         guest_label += f" ({covers} Qty/Pax)"
-    c.drawString(margin, bill_y - 2 * mm, guest_label)
+    c.drawString(_MARGIN, bill_y - 2 * mm, guest_label)
     c.setFillColor(TEXT_MUTED)
     c.setFont("Helvetica", 8.5)
-    c.drawString(margin, bill_y - 7 * mm, f"Customer/Project Ref: {data.get('customer_ref', '')}")
+    c.drawString(_MARGIN, bill_y - 7 * mm, f"Customer/Project Ref: {data.get('customer_ref', '')}")
 
     # Right – agent info (only if provided)
     served_by = data.get("handled_by", "").strip()
@@ -160,122 +168,175 @@ def _draw_billing_info(c: canvas.Canvas, width: float, height: float, data: dict
     if served_by or staff_id:
         c.setFillColor(BRAND_DARK)
         c.setFont("Helvetica-Bold", 9)
-        c.drawRightString(width - margin, bill_y + 3 * mm, "HANDLED BY")
+        c.drawRightString(width - _MARGIN, bill_y + 3 * mm, "HANDLED BY")
         c.setFillColor(TEXT_BODY)
         c.setFont("Helvetica", 9)
         served_str = f"{served_by} (ID: {staff_id})" if (served_by and staff_id) else (served_by or staff_id)
-        c.drawRightString(width - margin, bill_y - 2 * mm, served_str)
+        c.drawRightString(width - _MARGIN, bill_y - 2 * mm, served_str)
         c.setFillColor(TEXT_MUTED)
         c.setFont("Helvetica", 8.5)
-        c.drawRightString(width - margin, bill_y - 7 * mm, "Manager Approved: Yes")
+        c.drawRightString(width - _MARGIN, bill_y - 7 * mm, "Manager Approved: Yes")
 
     # Thin separator
     sep_y = height - 90 * mm
     c.setStrokeColor(LIGHT_BORDER)
     c.setLineWidth(0.5)
-    c.line(margin, sep_y, width - margin, sep_y)
+    c.line(_MARGIN, sep_y, width - _MARGIN, sep_y)
 
     return sep_y
 
 
-def _build_items_table(items: list[dict], data: dict) -> tuple[Table, set[int]]:
+# Total width of all columns – used for centering
+_TABLE_COL_WIDTHS = [20 * mm, 83 * mm, 18 * mm, 22 * mm, 18 * mm, 27 * mm]
+_TABLE_TOTAL_W   = sum(_TABLE_COL_WIDTHS)         # 188 mm
+_TABLE_X         = (W - _TABLE_TOTAL_W) / 2       # left-edge to perfectly centre on A4
+
+_TABLE_HEADER = ["DATE", "ITEM DESCRIPTION", "QTY", "UNIT (Rs)", "GST%", "AMOUNT (Rs)"]
+
+# Theme-independent table styling, shared by every invoice
+_BASE_STYLE_CMDS: tuple[tuple, ...] = (
+    # Header row
+    ("TEXTCOLOR",     (0, 0), (-1, 0), WHITE),
+    ("FONTNAME",      (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE",      (0, 0), (-1, 0), 8),
+    ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
+    ("TOPPADDING",    (0, 0), (-1, 0), 5),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 5),
+    # Body rows
+    ("FONTNAME",      (0, 1), (-1, -1), "Helvetica"),
+    ("FONTSIZE",      (0, 1), (-1, -1), 8),
+    ("TEXTCOLOR",     (0, 1), (-1, -1), TEXT_BODY),
+    ("TOPPADDING",    (0, 1), (-1, -1), 3),
+    ("BOTTOMPADDING", (0, 1), (-1, -1), 3),
+    ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
+    # Grid lines (header underline is themed, see _build_items_table)
+    ("LINEBELOW",     (0, 1), (-1, -1), 0.3, LIGHT_BORDER),
+    ("LINEAFTER",     (0, 0), (-1, -1), 0.3, LIGHT_BORDER),
+    # Column alignment: date centred, description left, rest centred, amount right
+    ("ALIGN",  (0, 1), (0, -1), "CENTER"),   # DATE
+    ("ALIGN",  (1, 1), (1, -1), "LEFT"),     # DESCRIPTION
+    ("ALIGN",  (2, 1), (2, -1), "CENTER"),   # QTY
+    ("ALIGN",  (3, 1), (3, -1), "CENTER"),   # UNIT
+    ("ALIGN",  (4, 1), (4, -1), "CENTER"),   # GST%
+    ("ALIGN",  (5, 1), (5, -1), "RIGHT"),    # AMOUNT
+)
+
+# Cell formatters, bound once instead of parsing an f-string spec per cell
+_fmt_money = "{:,.2f}".format
+_fmt_qty   = "{:g}".format
+
+
+@functools.lru_cache(maxsize=256)
+def _section_label(date_str: str, category: str) -> str:
+    """Section label: "— SERVICE  —  27 Jan —"."""
+    label_parts = []
+    if category:
+        label_parts.append(category.upper())
+    if date_str:
+        label_parts.append(date_str)
+    return f"— {'  —  '.join(label_parts)} —"
+
+
+_ITEM_DEFAULTS = {
+    "date": "",
+    "category": "",
+    "description": "",
+    "qty": 0,
+    "unit_price": 0,
+    "gst_pct": 0,
+    "amount": 0,
+}
+
+
+def _item_rows(items: list[dict] | list[tuple] | dict[str, Any]) -> list[tuple]:
+    """
+    Normalise `items` to row tuples ordered like _ITEM_DEFAULTS.
+    Accepts a list of row dicts, a list of row tuples in that order
+    (e.g. utils.Item) or a dict of equal-length columns.
+    """
+    if isinstance(items, dict):
+        n = len(next(iter(items.values()), ()))
+        cols = [items[k] if k in items else [d] * n for k, d in _ITEM_DEFAULTS.items()]
+        return list(zip(*cols))
+    return [
+        tuple(item) if isinstance(item, tuple) else tuple(item.get(k, d) for k, d in _ITEM_DEFAULTS.items())
+        for item in items
+    ]
+
+
+def _cell_rows(rows: list[tuple]) -> tuple[tuple[str, ...], ...]:
+    """
+    Format _item_rows() output into the strings the table prints, in the
+    same field order. Rows that compare equal but print differently
+    (gst_pct 5 vs 5.0) stay distinct, so this is safe as a cache key.
+    """
+    return tuple(
+        (str(date_str), str(category), str(description), _fmt_qty(to_float(qty)),
+         _fmt_money(to_float(unit_price)), f"{gst_pct}%", _fmt_money(to_float(amount)))
+        for date_str, category, description, qty, unit_price, gst_pct, amount in rows
+    )
+
+
+def _build_items_table(rows: tuple[tuple[str, ...], ...], data: dict) -> tuple[Table, set[int]]:
     """
-    Build the ReportLab Table, automatically grouping rows by (date, category)
-    and inserting styled section-separator rows between each group.
+    Build the ReportLab Table from _cell_rows() output, automatically grouping
+    rows by (date, category) and inserting styled section-separator rows
+    between each group.
     """
     theme = _get_theme(data)
-    col_widths = [20 * mm, 83 * mm, 18 * mm, 22 * mm, 18 * mm, 27 * mm]  # must match _TABLE_COL_WIDTHS
-    header = ["DATE", "ITEM DESCRIPTION", "QTY", "UNIT (Rs)", "GST%", "AMOUNT (Rs)"]
 
-    # ── Group items by (date, category) preserving insertion order ───────────
-    from collections import OrderedDict
-    groups: OrderedDict[tuple, list[dict]] = OrderedDict()
-    for item in items:
-        key = (str(item.get("date", "")), str(item.get("category", "")))
-        groups.setdefault(key, []).append(item)
+    # ── Group items by (date, category); dicts keep insertion order ───────────
+    groups: dict[tuple, list[tuple]] = {}
+    for row in rows:
+        key = (row[0], row[1])
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [row]
+        else:
+            group.append(row)
 
-    table_data = [header]
+    accent = theme["accent"]
+    table_data = [list(_TABLE_HEADER)]
     section_row_indices: set[int] = set()
 
+    # ── Base styles: themed commands, then the shared static prefix ─────────
+    style_cmds = [
+        ("BACKGROUND",    (0, 0), (-1, 0), theme["header"]),
+        ("LINEBELOW",     (0, 0), (-1, 0),  0.5, accent),
+        *_BASE_STYLE_CMDS,
+    ]
+
     for (date_str, category), group_items in groups.items():
-        # Section label: "— SERVICE | 27 Jan —"
-        label_parts = []
-        if category:
-            label_parts.append(category.upper())
-        if date_str:
-            label_parts.append(date_str)
-        section_label = "  —  ".join(label_parts)
-        section_label = f"— {section_label} —"
-
-        r_idx = len(table_data)
-        section_row_indices.add(r_idx)
-        table_data.append([section_label, "", "", "", "", ""])
+        # ── Section header row ───────────────────────────────────────────────
+        r = len(table_data)
+        section_row_indices.add(r)
+        table_data.append([_section_label(date_str, category), "", "", "", "", ""])
+        style_cmds += [
+            ("BACKGROUND",    (0, r), (-1, r), SECTION_TINT),
+            ("TEXTCOLOR",     (0, r), (-1, r), accent),
+            ("FONTNAME",      (0, r), (-1, r), "Helvetica-BoldOblique"),
+            ("FONTSIZE",      (0, r), (-1, r), 7.5),
+            ("SPAN",          (0, r), (-1, r)),
+            ("ALIGN",         (0, r), (-1, r), "CENTER"),
+            ("TOPPADDING",    (0, r), (-1, r), 4),
+            ("BOTTOMPADDING", (0, r), (-1, r), 4),
+        ]
 
         first_in_group = True
-        for item in group_items:
-            qty = float(item.get("qty", 0) or 0)
-            row = [
-                str(date_str) if first_in_group else "",
-                str(item.get("description", "")),
-                f"{qty:g}",
-                f"{float(item.get('unit_price', 0)):,.2f}",
-                f"{item.get('gst_pct', 0)}%",
-                f"{float(item.get('amount', 0)):,.2f}",
-            ]
-            table_data.append(row)
+        for _, _, description, qty, unit_price, gst_pct, amount in group_items:
+            table_data.append([
+                date_str if first_in_group else "",
+                description, qty, unit_price, gst_pct, amount,
+            ])
             first_in_group = False
 
-    # ── Base styles ───────────────────────────────────────────────────────────
-    style_cmds = [
-        # Header row
-        ("BACKGROUND",    (0, 0), (-1, 0), theme["header"]),
-        ("TEXTCOLOR",     (0, 0), (-1, 0), WHITE),
-        ("FONTNAME",      (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("FONTSIZE",      (0, 0), (-1, 0), 8),
-        ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
-        ("TOPPADDING",    (0, 0), (-1, 0), 5),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 5),
-        # Body rows
-        ("FONTNAME",      (0, 1), (-1, -1), "Helvetica"),
-        ("FONTSIZE",      (0, 1), (-1, -1), 8),
-        ("TEXTCOLOR",     (0, 1), (-1, -1), TEXT_BODY),
-        ("TOPPADDING",    (0, 1), (-1, -1), 3),
-        ("BOTTOMPADDING", (0, 1), (-1, -1), 3),
-        ("VALIGN",        (0, 0), (-1, -1), "MIDDLE"),
-        # Grid lines
-        ("LINEBELOW",     (0, 0), (-1, 0),  0.5, theme["accent"]),
-        ("LINEBELOW",     (0, 1), (-1, -1), 0.3, LIGHT_BORDER),
-        ("LINEAFTER",     (0, 0), (-1, -1), 0.3, LIGHT_BORDER),
-        # Column alignment: date centred, description left, rest centred, amount right
-        ("ALIGN",  (0, 1), (0, -1), "CENTER"),   # DATE
-        ("ALIGN",  (1, 1), (1, -1), "LEFT"),     # DESCRIPTION
-        ("ALIGN",  (2, 1), (2, -1), "CENTER"),   # QTY
-        ("ALIGN",  (3, 1), (3, -1), "CENTER"),   # UNIT
-        ("ALIGN",  (4, 1), (4, -1), "CENTER"),   # GST%
-        ("ALIGN",  (5, 1), (5, -1), "RIGHT"),    # AMOUNT
-    ]
-
-    # ── Per-row styles: section headers & alternating background ─────────────
-    data_row_counter = 0
-    for r in range(1, len(table_data)):
-        if r in section_row_indices:
-            style_cmds += [
-                ("BACKGROUND",    (0, r), (-1, r), colors.HexColor("#FFF3E6")),
-                ("TEXTCOLOR",     (0, r), (-1, r), theme["accent"]),
-                ("FONTNAME",      (0, r), (-1, r), "Helvetica-BoldOblique"),
-                ("FONTSIZE",      (0, r), (-1, r), 7.5),
-                ("SPAN",          (0, r), (-1, r)),
-                ("ALIGN",         (0, r), (-1, r), "CENTER"),
-                ("TOPPADDING",    (0, r), (-1, r), 4),
-                ("BOTTOMPADDING", (0, r), (-1, r), 4),
-            ]
-            data_row_counter = 0          # reset zebra stripe counter per group
-        else:
-            if data_row_counter % 2 == 1:  # odd data rows get a subtle tint
-                style_cmds.append(("BACKGROUND", (0, r), (-1, r), colors.HexColor("#FAFAF7")))
-            data_row_counter += 1
+        # ── Zebra stripes restart per group: every 2nd data row gets a tint ──
+        style_cmds += [
+            ("BACKGROUND", (0, z), (-1, z), ZEBRA_TINT)
+            for z in range(r + 2, r + 1 + len(group_items), 2)
+        ]
 
-    tbl = Table(table_data, colWidths=col_widths, repeatRows=1)
+    tbl = Table(table_data, colWidths=_TABLE_COL_WIDTHS, repeatRows=1)
     tbl.setStyle(TableStyle(style_cmds))
     return tbl, section_row_indices
 
@@ -284,22 +345,24 @@ def _build_items_table(items: list[dict], data: dict) -> tuple[Table, set[int]]:
 def _draw_totals(c: canvas.Canvas, width: float, tot_y: float, totals: dict, data: dict) -> float:
     """Draw the totals block. Returns y above the payment stamp."""
     theme = _get_theme(data)
-    margin = 18 * mm
-    box_right = width - margin
-    box_left = width - margin - 80 * mm
+    box_right = width - _MARGIN
+    box_left = width - _MARGIN - 80 * mm
     row_h = 6.5 * mm
+    # Bound once; tot_row() calls each of these for every totals line
+    set_fill, set_font = c.setFillColor, c.setFont
+    draw_string, draw_right = c.drawString, c.drawRightString
 
     def tot_row(y: float, label: str, value: str, bold: bool = False, highlight: bool = False):
         if highlight:
-            c.setFillColor(BRAND_DARK)
+            set_fill(BRAND_DARK)
             c.rect(box_left - 2, y - 1.5 * mm, box_right - box_left + 4, row_h, fill=1, stroke=0)
-            c.setFillColor(WHITE)
+            set_fill(WHITE)
         else:
-            c.setFillColor(TEXT_BODY)
+            set_fill(TEXT_BODY)
         font = "Helvetica-Bold" if bold else "Helvetica"
-        c.setFont(font, 9 if not highlight else 10)
-        c.drawString(box_left + 2 * mm, y + 1.5 * mm, label)
-        c.drawRightString(box_right - 2 * mm, y + 1.5 * mm, value)
+        set_font(font, 9 if not highlight else 10)
+        draw_string(box_left + 2 * mm, y + 1.5 * mm, label)
+        draw_right(box_right - 2 * mm, y + 1.5 * mm, value)
 
     subtotal = totals["subtotal"]
     cgst = totals["cgst"]
@@ -336,48 +399,49 @@ def _draw_totals(c: canvas.Canvas, width: float, tot_y: float, totals: dict, dat
     return gt_bar_bottom - 5 * mm
 
 
-
-# Total width of all columns – used for centering
-_TABLE_COL_WIDTHS = [20 * mm, 83 * mm, 18 * mm, 22 * mm, 18 * mm, 27 * mm]
-_TABLE_TOTAL_W   = sum(_TABLE_COL_WIDTHS)         # 188 mm
-_TABLE_X         = (W - _TABLE_TOTAL_W) / 2       # left-edge to perfectly centre on A4
+def _footer_text(data: dict) -> tuple[str, tuple[str, ...]]:
+    """Business name and footer lines; _render builds these once and reuses them on every page."""
+    return (
+        data.get("business_name", ""),
+        (
+            "Thank you for your business! We look forward to serving you again.",
+            "All prices are inclusive of applicable taxes as listed. Service charge as per invoice.",
+            f"Tax ID/GSTIN: {data.get('gstin', '')}  |  Subject to local jurisdiction.",
+            "This is a computer-generated invoice and does not require a physical signature.",
+        ),
+    )
 
 
 def _draw_footer(c: canvas.Canvas, width: float, data: dict,
+                 footer: tuple[str, tuple[str, ...]],
                  page: int = 1, total_pages: int = 1) -> None:
     """Draw the dark footer bar with dynamic page number."""
     theme = _get_theme(data)
     accent = theme["accent"]
     footer_bg = theme["footer"]
-    margin = 18 * mm
-    business_name = data.get('business_name', '')
-    footer_lines = [
-        f"Thank you for your business! We look forward to serving you again.",
-        "All prices are inclusive of applicable taxes as listed. Service charge as per invoice.",
-        f"Tax ID/GSTIN: {data.get('gstin', '')}  |  Subject to local jurisdiction.",
-        "This is a computer-generated invoice and does not require a physical signature.",
-    ]
+    business_name, footer_lines = footer
 
     c.setFillColor(footer_bg)
     c.rect(0, 0, width, 16 * mm, fill=1, stroke=0)
     c.setFillColor(accent)
     c.rect(0, 15.5 * mm, width, 0.5 * mm, fill=1, stroke=0)
 
+    set_fill, set_font, draw_centred = c.setFillColor, c.setFont, c.drawCentredString
     for i, line in enumerate(footer_lines):
-        c.setFillColor(colors.HexColor("#AAAAAA") if i > 0 else WHITE)
-        c.setFont("Helvetica" if i > 0 else "Helvetica-Bold", 7 if i > 0 else 8)
-        c.drawCentredString(width / 2, 12 * mm - i * 3.5 * mm, line)
+        set_fill(FOOTER_TEXT if i > 0 else WHITE)
+        set_font("Helvetica" if i > 0 else "Helvetica-Bold", 7 if i > 0 else 8)
+        draw_centred(width / 2, 12 * mm - i * 3.5 * mm, line)
 
-    c.setFillColor(colors.HexColor("#666666"))
+    c.setFillColor(FOOTER_PAGE_TEXT)
     c.setFont("Helvetica", 7)
     c.drawRightString(
-        width - margin,
+        width - _MARGIN,
         3 * mm,
         f"Page {page} of {total_pages}  |  {business_name}",
     )
 
 
-def _draw_continuation_header(c: canvas.Canvas, width: float, data: dict) -> float:
+def _draw_continuation_header(c: canvas.Canvas, width: float, data: dict, business_name: str) -> float:
     """
     Draw a compact top-of-page header for continuation pages.
     Returns the y-coordinate just below this header (where the table resumes).
@@ -385,7 +449,6 @@ def _draw_continuation_header(c: canvas.Canvas, width: float, data: dict) -> flo
     theme = _get_theme(data)
     header_bg = theme["header"]
     accent = theme["accent"]
-    margin = 18 * mm
     bar_h  = 14 * mm
 
     # Thin dark bar at top
@@ -394,12 +457,12 @@ def _draw_continuation_header(c: canvas.Canvas, width: float, data: dict) -> flo
 
     c.setFillColor(WHITE)
     c.setFont("Helvetica-Bold", 9)
-    c.drawString(margin, H - bar_h + 4 * mm, data.get("business_name", ""))
+    c.drawString(_MARGIN, H - bar_h + 4 * mm, business_name)
 
-    c.setFillColor(colors.HexColor("#AAAAAA"))
+    c.setFillColor(FOOTER_TEXT)
     c.setFont("Helvetica", 8)
     c.drawRightString(
-        width - margin,
+        width - _MARGIN,
         H - bar_h + 4 * mm,
         f"Invoice {data.get('invoice_number', '')}  (continued)",
     )
@@ -413,9 +476,26 @@ def _draw_continuation_header(c: canvas.Canvas, width: float, data: dict) -> flo
 
 # ── Public API ───────────────────────────────────────────────────────────────
 
-def generate_invoice(data: dict) -> bytes:
+def generate_invoice(data: dict, compress: bool = True) -> bytes:
     """
     Generate a PDF invoice from `data` and return raw bytes.
+    Thin wrapper around generate_invoice_to() for callers that need the
+    whole document in memory (e.g. st.download_button).
+    """
+    buf = io.BytesIO()
+    generate_invoice_to(buf, data, compress=compress)
+    return buf.getvalue()
+
+
+def generate_invoice_to(stream: Any, data: dict, compress: bool = True) -> None:
+    """
+    Render a PDF invoice from `data` into `stream` (a binary file object
+    or a filesystem path). ReportLab still assembles the whole document in
+    memory and writes it out on save(); this only saves callers their own
+    BytesIO and the getvalue() copy.
+    Page streams are deflated by default (roughly half the file size);
+    pass compress=False when the transport compresses anyway, e.g. a
+    gzip-encoded HTTP response.
     Supports multi-page overflow: items that don't fit on page 1 flow
     onto subsequent pages. Totals/payment/footer appear on the last page.
 
@@ -424,97 +504,137 @@ def generate_invoice(data: dict) -> bytes:
       Invoice:    invoice_number, invoice_date, visit_period
       Customer:   customer_name, customer_ref, customer_qty
       Staff:      handled_by, staff_id
-      Items:      items  (list[dict] – date, description, qty, unit_price, gst_pct, amount, category)
+      Items:      items  (list[dict] – date, description, qty, unit_price, gst_pct, amount, category,
+                          or a dict mapping those keys to equal-length columns)
       Totals:     totals (dict from calculate_totals())
       Payment:    payment_mode, payment_ref
       Words:      amount_in_words
     """
-    buf    = io.BytesIO()
-    margin = 18 * mm
+    c = canvas.Canvas(stream, pagesize=A4, pageCompression=int(compress))
+    _render(c, data)
+    c.save()
+
+
+def generate_invoices_batch(data_list: list[dict], compress: bool = True) -> list[bytes]:
+    """
+    Generate one PDF per entry in `data_list`, in order.
+    Logos are decoded once per distinct logo_path and shared across the
+    batch instead of being re-read from disk for every invoice.
+    """
+    logos: dict[str, Any] = {}
+    pdfs: list[bytes] = []
+    for data in data_list:
+        logo_path = data.get("logo_path")
+        if isinstance(logo_path, str) and logo_path:
+            if logo_path not in logos:
+                try:
+                    logos[logo_path] = ImageReader(logo_path)
+                except Exception:
+                    logos[logo_path] = logo_path  # let _draw_header fall back
+            data = {**data, "logo_path": logos[logo_path]}
+        pdfs.append(generate_invoice(data, compress=compress))
+    return pdfs
+
+
+# _split_items_table() hands the same Table objects to every caller, and
+# Table.drawOn() mutates them (binds .canv, tracks line colour/weight), so
+# concurrent renders (e.g. two Streamlit sessions) must draw them one at a time
+_TABLE_DRAW_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=32)
+def _split_items_table(
+    rows: tuple[tuple[str, ...], ...],
+    header: colors.Color,
+    accent: colors.Color,
+    page1_avail: float,
+    cont_avail: float,
+) -> tuple[tuple[Table, float], ...]:
+    """
+    Build the items table and split it into one (chunk, height) pair per
+    page: the page-1 chunk first, then one per continuation page. Each
+    chunk is laid out (wrapped) here once, so drawing needs no further
+    measuring. Cached so re-rendering an unchanged invoice (common while
+    editing in Streamlit) skips the build, split and layout entirely.
+    """
+    full_tbl, _ = _build_items_table(rows, {"_theme": {"header": header, "accent": accent}})
+
+    chunks = full_tbl.split(_TABLE_TOTAL_W, page1_avail)
+    pages = [chunks[0]]
+    if len(chunks) > 1:
+        # First chunk goes on page 1; keep splitting the rest for continuation
+        leftover = chunks[1]
+        while True:
+            pieces = leftover.split(_TABLE_TOTAL_W, cont_avail)
+            pages.append(pieces[0])
+            if len(pieces) == 1:
+                break
+            leftover = pieces[1]
+    return tuple((tbl, tbl.wrap(_TABLE_TOTAL_W, cont_avail)[1]) for tbl in pages)
 
-    FOOTER_H = 16 * mm   # dark footer bar height
-    MIN_GAP  =  4 * mm   # minimum whitespace kept before every page break
-    TOTALS_H = 62 * mm   # space needed for totals + payment stamp on last page
 
-    c = canvas.Canvas(buf, pagesize=A4)
-    c.setTitle(f"{data.get('business_name', 'Invoice')} – Invoice {data.get('invoice_number', '')}")
+def _render(c: canvas.Canvas, data: dict) -> None:
+    """Draw every page of the invoice onto a pre-built canvas (caller saves)."""
+    invoice_number = data.get("invoice_number", "")
+    footer = _footer_text(data)   # same on every page
+    c.setTitle(f"{data.get('business_name', 'Invoice')} – Invoice {invoice_number}")
     c.setAuthor(data.get("business_name", ""))
-    c.setSubject(f"Invoice {data.get('invoice_number', '')}")
+    c.setSubject(f"Invoice {invoice_number}")
 
     # ── Page 1 fixed elements ─────────────────────────────────────────────────
     _draw_header(c, W, H, data)
     _draw_meta_box(c, W, H, data)
     sep_y = _draw_billing_info(c, W, H, data)
 
-    items  = data.get("items", [])
+    items  = _item_rows(data.get("items", []))
     totals = data.get("totals", {})
 
     if not items:
         words_y = _draw_totals(c, W, sep_y - 30 * mm, totals, data)
         _draw_payment_stamp(c, W, words_y, data)
-        _draw_footer(c, W, data, page=1, total_pages=1)
-        c.save()
-        buf.seek(0)
-        return buf.getvalue()
+        _draw_footer(c, W, data, footer, page=1, total_pages=1)
+        return
 
-    # ── Build the full table once ─────────────────────────────────────────────
-    full_tbl, _ = _build_items_table(items, data)
+    # Intermediate pages only need _MIN_GAP before footer – fill rows as far as possible
+    page1_avail = sep_y - 2 * mm - _FOOTER_H - _MIN_GAP
 
-    # Intermediate pages only need MIN_GAP before footer – fill rows as far as possible
-    page1_avail = sep_y - 2 * mm - FOOTER_H - MIN_GAP
-
-    cont_top   = H - 14 * mm - 3 * mm   # just below continuation header stripe
-    cont_avail = cont_top - FOOTER_H - MIN_GAP
-
-    # ── Split table across pages ──────────────────────────────────────────────
-    remaining_tbls: list[Table] = []
-    chunks = full_tbl.split(_TABLE_TOTAL_W, page1_avail)
-
-    if len(chunks) == 1:
-        # Everything fits on page 1
-        remaining_tbls = []
-        page1_tbl = chunks[0]
-    else:
-        # First chunk goes on page 1; keep splitting the rest for continuation
-        page1_tbl = chunks[0]
-        leftover  = chunks[1]
-        while True:
-            pieces = leftover.split(_TABLE_TOTAL_W, cont_avail)
-            remaining_tbls.append(pieces[0])
-            if len(pieces) == 1:
-                break
-            leftover = pieces[1]
+    # ── Build + split the table (memoised for unchanged items/theme/layout) ──
+    theme = _get_theme(data)
+    # Keyed on the printed cell strings, not the raw values (5 == 5.0)
+    table_pages = _split_items_table(_cell_rows(items), theme["header"], theme["accent"],
+                                     page1_avail, _CONT_AVAIL)
+    (page1_tbl, tbl_h), *remaining_tbls = table_pages
 
     total_pages = 1 + len(remaining_tbls)
 
     # ── Draw page 1 table (centered) ─────────────────────────────────────────
     doc_y = sep_y - 2 * mm
-    _, tbl_h = page1_tbl.wrap(_TABLE_TOTAL_W, doc_y)
-    page1_tbl.drawOn(c, _TABLE_X, doc_y - tbl_h)
+    with _TABLE_DRAW_LOCK:
+        page1_tbl.drawOn(c, _TABLE_X, doc_y - tbl_h)
     cur_bot_y = doc_y - tbl_h          # y at bottom of table on page 1
 
     page_num = 1
     if remaining_tbls:
-        _draw_footer(c, W, data, page=1, total_pages=1)  # page count finalised later
+        _draw_footer(c, W, data, footer, page=1, total_pages=1)  # page count finalised later
         page_num = 2
 
-        for tbl_chunk in remaining_tbls:
+        for tbl_chunk, ch in remaining_tbls:
             c.showPage()
-            top_y = _draw_continuation_header(c, W, data)
-            _, ch = tbl_chunk.wrap(_TABLE_TOTAL_W, cont_avail)
-            tbl_chunk.drawOn(c, _TABLE_X, top_y - ch)
+            top_y = _draw_continuation_header(c, W, data, footer[0])
+            with _TABLE_DRAW_LOCK:
+                tbl_chunk.drawOn(c, _TABLE_X, top_y - ch)
             cur_bot_y = top_y - ch
-            _draw_footer(c, W, data, page=page_num, total_pages=1)
+            _draw_footer(c, W, data, footer, page=page_num, total_pages=1)
             page_num += 1
     else:
-        _draw_footer(c, W, data, page=1, total_pages=1)
+        _draw_footer(c, W, data, footer, page=1, total_pages=1)
 
     # ── Totals: if not enough room below last table chunk, start a new page ───
-    if cur_bot_y - FOOTER_H < TOTALS_H:
+    if cur_bot_y - _FOOTER_H < _TOTALS_H:
         c.showPage()
-        _draw_continuation_header(c, W, data)
-        _draw_footer(c, W, data, page=page_num, total_pages=1)
-        cur_bot_y = cont_top   # full continuation page height available
+        _draw_continuation_header(c, W, data, footer[0])
+        _draw_footer(c, W, data, footer, page=page_num, total_pages=1)
+        cur_bot_y = _CONT_TOP  # full continuation page height available
 
     tot_y = cur_bot_y - 6 * mm
     words_y = _draw_totals(c, W, tot_y, totals, data)
@@ -522,33 +642,28 @@ def generate_invoice(data: dict) -> bytes:
     # Amount in words
     c.setFillColor(TEXT_MUTED)
     c.setFont("Helvetica-Oblique", 8)
-    c.drawString(margin, words_y, f"Amount in words: {data.get('amount_in_words', '')}")
+    c.drawString(_MARGIN, words_y, f"Amount in words: {data.get('amount_in_words', '')}")
 
     _draw_payment_stamp(c, W, words_y, data)
 
-    c.save()
-    buf.seek(0)
-    return buf.getvalue()
-
 
 def _draw_payment_stamp(c: canvas.Canvas, width: float, words_y: float, data: dict) -> None:
     """Draw the green PAID / payment mode stamp below the amount-in-words line."""
-    margin = 18 * mm
     row_h  = 6.5 * mm
     stamp_y = words_y - 1.5 * row_h
 
-    c.setFillColor(colors.HexColor("#ffffff"))
-    c.roundRect(margin, stamp_y - 4 * mm, 80 * mm, 10 * mm, 2, fill=1, stroke=0)
-    c.setStrokeColor(colors.HexColor("#ffffff"))
+    c.setFillColor(STAMP_BG)
+    c.roundRect(_MARGIN, stamp_y - 4 * mm, 80 * mm, 10 * mm, 2, fill=1, stroke=0)
+    c.setStrokeColor(STAMP_BG)
     c.setLineWidth(0.8)
-    c.roundRect(margin, stamp_y - 4 * mm, 80 * mm, 10 * mm, 2, fill=0, stroke=1)
+    c.roundRect(_MARGIN, stamp_y - 4 * mm, 80 * mm, 10 * mm, 2, fill=0, stroke=1)
 
-    c.setFillColor(colors.HexColor("#000000"))
+    c.setFillColor(STAMP_TEXT)
     c.setFont("Helvetica-Bold", 9)
     payment_mode = data.get("payment_mode", "PAID")
     payment_ref  = data.get("payment_ref", "")
-    c.drawString(margin + 3 * mm, stamp_y + 2 * mm, payment_mode.upper())
+    c.drawString(_MARGIN + 3 * mm, stamp_y + 2 * mm, payment_mode.upper())
 
     ref_str = f"  Ref: {payment_ref}" if payment_ref else ""
     c.setFont("Helvetica", 8)
-    c.drawString(margin + 18 * mm, stamp_y + 2 * mm, f"| {ref_str}")
+    c.drawString(_MARGIN + 18 * mm, stamp_y + 2 * mm, f"| {ref_str}")
@@ -0,0 +1,16 @@
+from invoice_generator import generate_invoice
+from utils import calculate_totals
+
+
+def _invoice(gst_pct):
+    item = {"date": "1 Jan", "description": "Tea", "qty": 1, "unit_price": 10.0,
+            "gst_pct": gst_pct, "amount": 10.0}
+    return {"items": [item], "totals": calculate_totals([item], 2.5, 2.5, 5),
+            "business_name": "Acme"}
+
+
+def test_items_table_prints_values_as_given_regardless_of_cache():
+    # 5 == 5.0 hash alike; the cached table must not reuse the other's cells
+    assert b"(5%)" in generate_invoice(_invoice(5), compress=False)
+    assert b"(5.0%)" in generate_invoice(_invoice(5.0), compress=False)
+    assert b"(5%)" in generate_invoice(_invoice(5), compress=False)
@@ -0,0 +1,146 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import utils
+from utils import _auto_close_json, _complete_json, _json_loads, _quick_search_query, convert_to_words
+
+
+def test_convert_to_words_indian_scales():
+    assert convert_to_words(15_00_000) == "Rupees Fifteen Lakh Only"
+    assert convert_to_words(12_34_56_789) == (
+        "Rupees Twelve Crore Thirty Four Lakh Fifty Six Thousand Seven Hundred Eighty Nine Only"
+    )
+
+
+def test_convert_to_words_negative_amount():
+    # A refund/discount line can push the grand total below zero
+    assert convert_to_words(-5.5) == "Rupees Minus Five and 50 Paise Only"
+    assert convert_to_words(-0.25) == "Rupees Minus Zero and 25 Paise Only"
+    assert convert_to_words(-1_00_00_000) == "Rupees Minus One Crore Only"
+
+
+def test_quick_search_query_needs_a_business_signal():
+    assert _quick_search_query("hired AC Repair Pros in Delhi") == "AC Repair Pros Delhi"
+    assert _quick_search_query("stayed at The Grand Hotel") == "The Grand Hotel"
+    # Payment methods, dates and bare person names go to the LLM instead
+    assert _quick_search_query("Paid by Credit Card") is None
+    assert _quick_search_query("from Monday To Friday") is None
+    assert _quick_search_query("work with John Smith") is None
+
+
+def test_auto_close_json_parses_every_truncation():
+    reply = {
+        "business": {"name": 'Bob "The" Plumber', "gstin": None, "verified": True},
+        "items": [{"qty": 2.5, "unit_price": -1.25e3, "flags": [False, None, 7]}],
+    }
+    # ensure_ascii=True turns the non-ASCII note into \uXXXX escapes and pairs
+    non_ascii = json.dumps({**reply, "note": "Café ₹ 😀 C:\\"}, ensure_ascii=True)
+    for text in (json.dumps(reply), non_ascii):
+        for end in range(1, len(text) + 1):
+            _json_loads(_auto_close_json(text[:end]))
+
+
+class _FakeStream:
+    def __init__(self, pieces):
+        self._pieces = pieces
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self._pieces:
+            self.sent += 1
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)] if piece != "" else [])
+
+    def close(self):
+        self.closed = True
+
+
+def _stream_client(stream):
+    completions = SimpleNamespace(create=lambda **kwargs: stream)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def test_complete_json_stops_when_the_object_closes():
+    pieces = ['Sure "ok": ', '{"note": "a } and \\"{\\" b",', "", None,
+              ' "items": [{"qty": 1}]}', " Hope this helps!", " {more}"]
+    stream = _FakeStream(pieces)
+    text = _complete_json(_stream_client(stream), {})
+
+    # Braces inside strings and escaped quotes don't end the object early
+    assert json.loads(text[text.index("{"):]) == {"note": 'a } and "{" b', "items": [{"qty": 1}]}
+    assert "Hope" not in text
+    assert stream.sent == 5 and stream.closed
+
+
+def test_complete_json_returns_everything_if_no_object_closes():
+    stream = _FakeStream(['{"a": ', '"b"'])
+    assert _complete_json(_stream_client(stream), {}) == '{"a": "b"'
+    assert stream.closed
+
+
+class _FakeBatches:
+    def __init__(self, statuses, output_file_id="out"):
+        self._statuses = list(statuses)
+        self._output_file_id = output_file_id
+        self.cancelled = []
+
+    def _batch(self):
+        status = self._statuses.pop(0) if len(self._statuses) > 1 else self._statuses[0]
+        return SimpleNamespace(id="b1", status=status, output_file_id=self._output_file_id)
+
+    def create(self, **kwargs):
+        return self._batch()
+
+    def retrieve(self, batch_id):
+        return self._batch()
+
+    def cancel(self, batch_id):
+        self.cancelled.append(batch_id)
+
+
+class _FakeBatchClient:
+    def __init__(self, batches, output_lines=()):
+        self.batches = batches
+        self.files = SimpleNamespace(
+            create=lambda **kwargs: SimpleNamespace(id="in"),
+            content=lambda file_id: SimpleNamespace(text="\n".join(output_lines)),
+        )
+
+
+def _batch_line(i, content):
+    body = {"choices": [{"message": {"content": content}}]}
+    return json.dumps({"custom_id": f"req-{i}", "response": {"body": body}})
+
+
+def test_ai_autofill_batch_completed_with_partial_output(monkeypatch):
+    reply = json.dumps({"business": {"name": "Acme"}, "items": [{"qty": 2, "unit_price": 10}]})
+    client = _FakeBatchClient(
+        _FakeBatches(["validating", "in_progress", "completed"]),
+        [_batch_line(2, "not json"), _batch_line(0, reply)],   # req-1 missing
+    )
+    monkeypatch.setattr(utils, "_openai_client", lambda *args: client)
+
+    first, second, third = utils.ai_autofill_batch(["a", "b", "c"], "key", poll_interval=0)
+    assert first["business"] == {"name": "Acme"}
+    assert first["items"][0].amount == 21.0
+    assert second is None and third is None
+
+
+def test_ai_autofill_batch_failed_raises(monkeypatch):
+    client = _FakeBatchClient(_FakeBatches(["in_progress", "failed"]))
+    monkeypatch.setattr(utils, "_openai_client", lambda *args: client)
+
+    with pytest.raises(RuntimeError, match="failed"):
+        utils.ai_autofill_batch(["a"], "key", poll_interval=0)
+
+
+def test_ai_autofill_batch_timeout_cancels(monkeypatch):
+    batches = _FakeBatches(["in_progress"])
+    monkeypatch.setattr(utils, "_openai_client", lambda *args: _FakeBatchClient(batches))
+
+    with pytest.raises(RuntimeError, match="did not finish"):
+        utils.ai_autofill_batch(["a"], "key", poll_interval=0.01, timeout=0.05)
+    assert batches.cancelled == ["b1"]
@@ -3,48 +3,112 @@ utils.py – Helper functions for AI Invoice Generator
 """
 
 from __future__ import annotations
+import base64
+import functools
 import json
 import re
 import random
-import string
-import requests
-from typing import Any
+import secrets
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import requests
+
+try:  # optional C-accelerated parser; its JSONDecodeError subclasses json's
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# ---------------------------------------------------------------------------
+# Item record
+# ---------------------------------------------------------------------------
+
+class Item(NamedTuple):
+    """
+    One invoice line. Field order matches the PDF table's row tuples, so an
+    Item can be handed to invoice_generator as-is.
+    """
+    date: str
+    category: str
+    description: str
+    qty: float
+    unit_price: float
+    gst_pct: float
+    amount: float
 
-import pandas as pd
 
 # ---------------------------------------------------------------------------
 # Totals calculation
 # ---------------------------------------------------------------------------
 
+def to_float(x: Any) -> float:
+    """float(x or 0), skipping the conversion for values that already are floats."""
+    return x if isinstance(x, float) else float(x or 0)
+
+
 def calculate_totals(
-    items: list[dict],
+    items: list[dict] | list[Item],
     cgst_pct: float,
     sgst_pct: float,
     service_charge_pct: float,
 ) -> dict[str, float]:
     """
     Given a list of item dicts (each with 'qty', 'unit_price', 'gst_pct')
-    and the overall charge percentages, return a dict of computed totals.
+    or Item records and the overall charge percentages, return a dict of computed totals.
 
     Each item's 'amount' = qty * unit_price * (1 + gst_pct / 100)
     """
-    subtotal_pre_gst = 0.0
-    item_tax_total = 0.0
-
+    rows = []
     for item in items:
+        if isinstance(item, Item):
+            rows.append((item.qty, item.unit_price, item.gst_pct))
+            continue
         try:
-            qty = float(item.get("qty", 0) or 0)
-            unit_price = float(item.get("unit_price", 0) or 0)
-            gst_pct = float(item.get("gst_pct", 0) or 0)
+            rows.append((
+                to_float(item.get("qty", 0)),
+                to_float(item.get("unit_price", 0)),
+                to_float(item.get("gst_pct", 0)),
+            ))
         except (ValueError, TypeError):
             continue
 
-        base = qty * unit_price
-        tax = base * gst_pct / 100
-        subtotal_pre_gst += base
-        item_tax_total += tax
+    arr = np.array(rows, dtype=np.float64).reshape(-1, 3)
+    # NaN/inf rows (e.g. "nan" strings) are bad rows too – skip them like the rest
+    arr = arr[np.isfinite(arr).all(axis=1)]
+    return calculate_totals_arrays(
+        arr[:, 0], arr[:, 1], arr[:, 2], cgst_pct, sgst_pct, service_charge_pct
+    )
+
 
-    subtotal = subtotal_pre_gst + item_tax_total  # inclusive price shown as subtotal
+def calculate_totals_arrays(
+    qty: np.ndarray,
+    unit_price: np.ndarray,
+    gst_pct: np.ndarray,
+    cgst_pct: float,
+    sgst_pct: float,
+    service_charge_pct: float,
+) -> dict[str, float]:
+    """
+    Columnar variant of calculate_totals() for equal-length float arrays
+    (e.g. DataFrame columns already coerced to numbers). Returns the same dict.
+    """
+    base = qty * unit_price
+    subtotal_pre_gst = float(base.sum())
+    # Dot product folds the per-item tax multiply and the sum into one native pass
+    item_tax_total = float(np.dot(base, gst_pct)) / 100
+    subtotal = subtotal_pre_gst + item_tax_total
+    return _totals_from_subtotal(subtotal, cgst_pct, sgst_pct, service_charge_pct)
+
+
+def _totals_from_subtotal(
+    subtotal: float,
+    cgst_pct: float,
+    sgst_pct: float,
+    service_charge_pct: float,
+) -> dict[str, float]:
     cgst = subtotal * cgst_pct / 100
     sgst = subtotal * sgst_pct / 100
     service_charge = subtotal * service_charge_pct / 100
@@ -62,9 +126,15 @@ def calculate_totals(
     }
 
 
-def compute_item_amount(qty: float, unit_price: float, gst_pct: float) -> float:
-    """Return amount for a single item row (base + GST)."""
-    return round(qty * unit_price * (1 + gst_pct / 100), 2)
+def compute_item_amount(
+    qty: float | np.ndarray, unit_price: float | np.ndarray, gst_pct: float | np.ndarray
+) -> float | np.ndarray:
+    """
+    Return the amount (base + GST, rounded to paise) for an item row, or
+    element-wise for NumPy arrays / pandas columns. The editor, the AI parse
+    and the PDF all price lines through here so they round identically.
+    """
+    return np.round(qty * unit_price * (1 + gst_pct / 100), 2)
 
 
 # ---------------------------------------------------------------------------
@@ -91,32 +161,49 @@ def _words_lt_1000(n: int) -> str:
     return (ONES[n // 100] + " Hundred" + (" " + _words_lt_100(n % 100) if n % 100 else "")).strip()
 
 
+# Every 0–999 group spelled out once at import; conversion is then pure indexing
+_WORDS_LT_1000 = tuple(_words_lt_1000(n) for n in range(1000))
+
+
+# Scale words for the lakh, thousand and below-thousand groups
+_GROUP_SCALES = (" Lakh", " Thousand", "")
+
+
+def _indian_groups(n: int) -> tuple[int, int, int, int]:
+    """Split a whole-rupee amount into (crore, lakh, thousand, below-thousand)."""
+    crore, n = divmod(n, 1_00_00_000)
+    lakh, n = divmod(n, 1_00_000)
+    thousand, n = divmod(n, 1000)
+    return crore, lakh, thousand, n
+
+
+def _rupee_words(n: int) -> str:
+    if n == 0:
+        return "Zero"
+    if n < 0:
+        # divmod floors toward -inf, so split the magnitude, never n itself
+        return "Minus " + _rupee_words(-n)
+    crore, *groups = _indian_groups(n)
+    parts = [_WORDS_LT_1000[g] + scale for g, scale in zip(groups, _GROUP_SCALES) if g]
+    if crore:
+        # 1000+ crore reads as "One Thousand Crore", "One Lakh Crore", …
+        parts.insert(0, _rupee_words(crore) + " Crore")
+    return " ".join(parts)
+
+
 def convert_to_words(amount: float) -> str:
     """Convert a rupee amount to Indian-English words."""
-    rupees = int(amount)
-    paise = round((amount - rupees) * 100)
-
-    def _rupee_words(n: int) -> str:
-        if n == 0:
-            return "Zero"
-        parts = []
-        if n >= 10_00_000:
-            parts.append(_words_lt_1000(n // 10_00_000) + " Crore")
-            n %= 10_00_000
-        if n >= 1_00_000:
-            parts.append(_words_lt_1000(n // 1_00_000) + " Lakh")
-            n %= 1_00_000
-        if n >= 1000:
-            parts.append(_words_lt_1000(n // 1000) + " Thousand")
-            n %= 1000
-        if n >= 100:
-            parts.append(ONES[n // 100] + " Hundred")
-            n %= 100
-        if n:
-            parts.append(_words_lt_100(n))
-        return " ".join(parts)
-
-    result = "Rupees " + _rupee_words(rupees)
+    return _convert_to_words_cached(round(amount * 100))
+
+
+@functools.lru_cache(maxsize=4096)
+def _convert_to_words_cached(paise_total: int) -> str:
+    """Words for an amount given in whole paise, so the cache key is an exact int."""
+    # Negative totals (refund/discount lines) read "Rupees Minus …"
+    sign = "Minus " if paise_total < 0 else ""
+    rupees, paise = divmod(abs(paise_total), 100)
+
+    result = "Rupees " + sign + _rupee_words(rupees)
     if paise:
         result += f" and {paise} Paise"
     return result + " Only"
@@ -127,14 +214,18 @@ def convert_to_words(amount: float) -> str:
 # ---------------------------------------------------------------------------
 
 def generate_utr() -> str:
-    """Generate a random 12-character alphanumeric UTR."""
-    return "".join(random.choices(string.ascii_uppercase + string.digits, k=12))
+    """Generate a random 12-character alphanumeric UTR (A–Z, 2–7)."""
+    return base64.b32encode(secrets.token_bytes(8)).decode("ascii")[:12]
 
 def generate_invoice_number() -> str:
     """Generate a random invoice number like INV-123456."""
     return f"INV-{random.randint(100000, 999999)}"
 
 
+# Both system prompts are sent verbatim as messages[0], ahead of anything
+# per-request. Providers with automatic prefix caching (OpenAI, Groq, …)
+# then bill/serve that static prefix from cache on every call – keep them
+# free of per-user data and formatting placeholders.
 SYSTEM_PROMPT_EXTRACT_QUERY = """You are an assistant that extracts business search queries.
 The user will describe an order or service request (e.g. "I hired AC Repair Pros in Delhi..." or "Plumbing service from Bob's Pipes...").
 Return a JSON object with two keys:
@@ -193,6 +284,58 @@ Return ONLY a valid JSON object with the following structure – no extra text:
 }
 """
 
+AI_MODEL = "openai/gpt-oss-120b"
+
+# Numeric item fields and the defaults used when the model omits them
+_AI_NUMERIC_DEFAULTS = (("qty", 1), ("unit_price", 0), ("gst_pct", 5))
+
+# Markdown code fences the model sometimes wraps its JSON in
+_FENCE_RE = re.compile(r"```(?:json)?")
+# "hired AC Repair Pros in Delhi", "from Sharma Traders Ltd", "at The Grand Hotel"
+_BUSINESS_RE = re.compile(
+    r"\b((?i:hired|from|at|by|with))\s+"
+    r"([A-Z][\w&'.-]*(?:\s+(?:&\s+)?[A-Z][\w&'.-]*){1,5})"
+    r"(?:\s+in\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?))?"
+)
+# Last word that marks a capitalised phrase as a business name on its own
+_BUSINESS_SUFFIXES = frozenset({
+    "pvt", "ltd", "limited", "llp", "inc", "co", "corp", "company", "store",
+    "stores", "services", "solutions", "enterprises", "traders", "agency",
+    "hotel", "hotels", "restaurant", "cafe", "clinic", "pros", "mart",
+})
+# Capitalised phrases that look like names but are payments or dates
+_NOT_BUSINESS_WORDS = frozenset({
+    "card", "credit", "debit", "upi", "cash", "cheque", "neft", "rtgs",
+    "imps", "gpay", "paytm", "phonepe", "bank", "transfer", "wallet",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday",
+    "sunday", "january", "february", "march", "april", "may", "june", "july",
+    "august", "september", "october", "november", "december",
+})
+# A trailing object key with no value yet: '{"a": 1, "b"' / '{"b"'
+_DANGLING_KEY_RE = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*$')
+# A string cut off mid-escape: a lone backslash, \u00, or a high surrogate
+# whose pair never arrived (\ud83d\ude); escaped backslashes are kept
+_PARTIAL_ESCAPE_RE = re.compile(
+    r"(?<!\\)(?:\\\\)*((?:\\u[dD][89abAB][0-9a-fA-F]{2})?(?:\\u[0-9a-fA-F]{0,3}|\\)?)$"
+)
+# A value cut off mid-token: '"qty": 2.' / '-1.25e' / '"ok": tru' / '[nul'
+_PARTIAL_SCALAR_RE = re.compile(
+    r"([:\[,])\s*(?:-|-?\d+\.|-?\d+(?:\.\d+)?[eE][+-]?|tr?u?|f(?:a(?:ls?)?)?|nu?l?)$"
+)
+# Outermost {...} span of a reply that wraps its JSON in prose
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=8)
+def _openai_client(api_key: str, base_url: str) -> Any:
+    """Reuse one client (and its keep-alive connection pool) per key / endpoint."""
+    try:
+        from openai import OpenAI  # type: ignore
+    except ImportError:
+        raise RuntimeError("openai package not installed. Run: pip install openai")
+
+    return OpenAI(api_key=api_key, base_url=base_url)
+
 
 def ai_autofill(prompt: str, api_key: str, tavily_api_key: str = "", base_url: str = "https://api.groq.com/openai/v1") -> dict:
     """
@@ -200,25 +343,104 @@ def ai_autofill(prompt: str, api_key: str, tavily_api_key: str = "", base_url: s
     description into structured invoice rows and business details.
     
     If tavily_api_key is provided, optionally performs a web search to enrich business data.
+    Per-request text (prompt, search results) only ever goes in the user
+    message, after the static system prompt, so provider prompt caches apply.
 
-    Returns a dict with "business" and "items".
+    Returns a dict with "business" and "items" (a list of Item), plus
+    "degraded" = True when the search step failed or a truncated reply had
+    to be repaired, so callers can avoid caching it.
     Raises RuntimeError with a descriptive message on failure.
     """
-    try:
-        from openai import OpenAI  # type: ignore
-    except ImportError:
-        raise RuntimeError("openai package not installed. Run: pip install openai")
-
     if not api_key or api_key.strip() == "":
         raise RuntimeError("Please provide a valid API key in the sidebar.")
 
-    client = OpenAI(api_key=api_key.strip(), base_url=base_url)
+    client = _openai_client(api_key.strip(), base_url)
 
-    # STEP 1: Determine if we need to search for the business
-    search_context = ""
+    # No search possible without a key, so skip the query-extraction step
+    search_context = _search_context(client, prompt, tavily_api_key) if tavily_api_key else ""
+
+    # STEP 3: Final extraction combining user prompt and search context
+    result = _parse_autofill_response(_complete_json(client, _parse_request(prompt, search_context or "")))
+    if search_context is None:
+        result["degraded"] = True
+    return result
+
+
+def _complete_json(client: Any, request: dict) -> str:
+    """
+    Stream a chat completion and stop reading as soon as the first top-level
+    JSON object is closed, instead of waiting out any trailing commentary.
+    Returns the text received (the whole reply if no object ever closes).
+    """
+    stream = client.chat.completions.create(**request, stream=True)
+    parts: list[str] = []
+    depth, started, in_str, escaped = 0, False, False, False
+    try:
+        for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if not text:
+                continue
+            parts.append(text)
+            # Brace counter that ignores braces inside JSON strings
+            for ch in text:
+                if in_str:
+                    if escaped:
+                        escaped = False
+                    elif ch == "\\":
+                        escaped = True
+                    elif ch == '"':
+                        in_str = False
+                elif ch == "{":
+                    depth += 1
+                    started = True
+                elif not started:
+                    continue
+                elif ch == '"':
+                    in_str = True
+                elif ch == "}":
+                    depth -= 1
+                    if depth == 0:
+                        return "".join(parts)
+    finally:
+        stream.close()
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=1)
+def _tavily_session() -> requests.Session:
+    """Shared session so repeat Tavily searches reuse the TCP/TLS connection."""
+    import requests  # only needed once a search actually runs
+
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+def _quick_search_query(prompt: str) -> str | None:
+    """
+    Cheap stand-in for the query-extraction LLM call: a capitalised business
+    name of 2+ words after "hired/from/at/by/with", plus an optional
+    "in <City>". Only trusted when the name ends in a business suffix
+    ("Ltd", "Store", ...) or follows "hired/from/at" with a city, and never
+    when it contains a payment or date word; otherwise returns None so the
+    caller falls back to asking the model (and a customer's own name is
+    not sent to Tavily).
+    """
+    for m in _BUSINESS_RE.finditer(prompt):
+        trigger, name, city = m.group(1).lower(), m.group(2), m.group(3)
+        words = [w.strip(".,'&").lower() for w in name.split()]
+        if _NOT_BUSINESS_WORDS.intersection(words):
+            continue
+        if words[-1] in _BUSINESS_SUFFIXES or (city and trigger in ("hired", "from", "at")):
+            return f"{name} {city or ''}".strip()
+    return None
+
+
+def _llm_search_query(client: Any, prompt: str) -> str | None:
+    """STEP 1 via the model: the business to look up, "" if none, None on failure."""
     try:
         query_response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",
+            model=AI_MODEL,
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT_EXTRACT_QUERY},
                 {"role": "user", "content": prompt},
@@ -227,113 +449,268 @@ def ai_autofill(prompt: str, api_key: str, tavily_api_key: str = "", base_url: s
             max_tokens=300,
         )
         query_raw = query_response.choices[0].message.content or ""
-        json_match = re.search(r'\{.*\}', query_raw, re.DOTALL)
+        json_match = _JSON_OBJ_RE.search(query_raw)
         if json_match:
             query_raw = json_match.group(0)
         else:
-            query_raw = re.sub(r"```(?:json)?", "", query_raw).strip().rstrip("`").strip()
+            query_raw = _FENCE_RE.sub("", query_raw).strip().rstrip("`").strip()
             
         print(f"Query Extraction Raw JSON: {query_raw}", flush=True)
-        query_data = json.loads(query_raw)
+        query_data = _json_loads(query_raw)
         
         needs_search = query_data.get("needs_search", False)
         search_query = query_data.get("search_query", "")
         print(f"Extraction result -> needs_search: {needs_search}, search_query: '{search_query}'", flush=True)
-        
-        # STEP 2: Use Tavily to search
-        if needs_search and search_query and tavily_api_key:
-            try:
-                tavily_resp = requests.post(
-                    "https://api.tavily.com/search",
-                    json={
-                        "api_key": tavily_api_key.strip(),
-                        "query": f"{search_query} details phone number address GSTIN company",
-                        "search_depth": "basic",
-                        "include_answer": True,
-                        "max_results": 3
-                    },
-                    timeout=10
-                )
-                if tavily_resp.status_code == 200:
-                    t_data = tavily_resp.json()
-                    search_context = f"Tavily Search Answer: {t_data.get('answer', '')}\n"
-                    for res in t_data.get("results", []):
-                        search_context += f"- {res.get('title')}: {res.get('content')}\n"
-                    print("Tavily search successful.", flush=True)
-                else:
-                    print(f"Tavily API Error {tavily_resp.status_code}: {tavily_resp.text}", flush=True)
-            except Exception as e:
-                print(f"Tavily search exception: {e}", flush=True)
-                
+        return search_query if needs_search else ""
     except Exception as e:
         print(f"Query extraction failed: {e}", flush=True)
+        return None
 
-    # STEP 3: Final extraction combining user prompt and search context
+
+def _search_context(client: Any, prompt: str, tavily_api_key: str) -> str | None:
+    """
+    STEP 1 + 2 of ai_autofill(): work out whether the business should be
+    looked up, and if so search Tavily. Returns the search context ("" if
+    no search was needed, None if either step failed).
+    """
+    # STEP 1: Determine if we need to search for the business. Nothing is
+    # sent to Tavily on a guess: a clear-cut name skips the model call, and
+    # anything else waits for the model to ask for a search
+    search_query = _quick_search_query(prompt)
+    if search_query is not None:
+        print(f"Heuristic search_query: '{search_query}'", flush=True)
+    else:
+        search_query = _llm_search_query(client, prompt)
+        if search_query is None:
+            return None
+
+    # STEP 2: Use Tavily to search
+    return _tavily_search(search_query, tavily_api_key)
+
+
+def _tavily_search(search_query: str, tavily_api_key: str) -> str | None:
+    """STEP 2: search Tavily for the business. Returns None on failure."""
+    search_context = ""
+    if search_query and tavily_api_key:
+        try:
+            tavily_resp = _tavily_session().post(
+                "https://api.tavily.com/search",
+                json={
+                    "api_key": tavily_api_key.strip(),
+                    "query": f"{search_query} details phone number address GSTIN company",
+                    "search_depth": "basic",
+                    "include_answer": True,
+                    "max_results": 3
+                },
+                timeout=10
+            )
+            if tavily_resp.status_code == 200:
+                t_data = tavily_resp.json()
+                search_context = f"Tavily Search Answer: {t_data.get('answer', '')}\n"
+                for res in t_data.get("results", []):
+                    search_context += f"- {res.get('title')}: {res.get('content')}\n"
+                print("Tavily search successful.", flush=True)
+            else:
+                print(f"Tavily API Error {tavily_resp.status_code}: {tavily_resp.text}", flush=True)
+                return None
+        except Exception as e:
+            print(f"Tavily search exception: {e}", flush=True)
+            return None
+
+    return search_context
+
+
+def _parse_request(prompt: str, search_context: str = "") -> dict:
+    """chat.completions body for the final extraction call."""
     final_prompt = f"User Order Description:\n{prompt}\n\n"
     if search_context:
         final_prompt += f"Background search context for the business:\n{search_context}\n"
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-120b",
-        messages=[
+    return {
+        "model": AI_MODEL,
+        "messages": [
             {"role": "system", "content": SYSTEM_PROMPT_PARSE},
             {"role": "user", "content": final_prompt},
         ],
-        temperature=0.2,
-        max_tokens=2500,
-    )
+        "temperature": 0.2,
+        "max_tokens": 2500,
+    }
 
-    raw = response.choices[0].message.content or ""
 
+def _ai_number(value: Any, default: float) -> float:
+    """A numeric field from the model; null, "" or non-numbers fall back to `default`."""
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _auto_close_json(s: str) -> str:
+    """
+    Complete JSON cut off mid-document (e.g. by max_tokens) in one pass:
+    close an open string (minus any half-written escape), drop a half-written number or true/false/null
+    (its key gets null), drop a dangling key or trailing comma, then
+    append the closing brackets still open, innermost first.
+    """
+    closers: list[str] = []
+    in_str = escaped = False
+    for ch in s:
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == "{":
+            closers.append("}")
+        elif ch == "[":
+            closers.append("]")
+        elif ch in "}]" and closers:
+            closers.pop()
+
+    if in_str:
+        s = s[:_PARTIAL_ESCAPE_RE.search(s).start(1)] + '"'   # never close mid-escape
+    else:
+        partial = _PARTIAL_SCALAR_RE.search(s)
+        if partial:
+            s = s[:partial.start(1) + 1]
+    s = s.rstrip(", \t\r\n")
+    if closers and closers[-1] == "}":
+        key = _DANGLING_KEY_RE.search(s)
+        if key:  # '{"a": 1, "b"' – a key with no value
+            s = s[:key.start() + (key.group(1) == "{")].rstrip(", \t\r\n")
+    if s.endswith(":"):
+        s += " null"
+    return s + "".join(reversed(closers))
+
+
+def _parse_autofill_response(raw: str) -> dict:
+    """Turn the model's reply into the ai_autofill() result dict."""
     # Robust JSON extraction
-    json_match = re.search(r'\{.*\}', raw, re.DOTALL)
+    json_match = _JSON_OBJ_RE.search(raw)
     if json_match:
         raw = json_match.group(0)
     else:
         # Fallback strip markdown code fences if present
-        raw = re.sub(r"```(?:json)?", "", raw).strip().rstrip("`").strip()
+        raw = _FENCE_RE.sub("", raw).strip().rstrip("`").strip()
 
-    parsed_data = {}
+    repaired = False
     try:
-        parsed_data = json.loads(raw)
+        parsed_data = _json_loads(raw)
     except json.JSONDecodeError as exc:
-        # Attempt to auto-repair lightly truncated JSON
-        for suffix in ["", "}", "]}", "]}", '"}', '"}]}']:
-            try:
-                fixed_raw = raw.rstrip(", ") + suffix
-                parsed_data = json.loads(fixed_raw)
-                break
-            except json.JSONDecodeError:
-                continue
-        else:
+        # Attempt to auto-repair truncated JSON
+        try:
+            parsed_data = _json_loads(_auto_close_json(raw))
+            repaired = True
+        except json.JSONDecodeError:
             raise RuntimeError(f"AI returned invalid JSON: {exc}\n\nRaw response:\n{raw}")
 
     items_raw = parsed_data.get("items", [])
     business_raw = parsed_data.get("business", {})
     staff_raw = parsed_data.get("staff", {})
 
-    # Normalise item keys
-    normalised_items = []
-    for row in items_raw:
-        normalised_items.append(
-            {
-                "date": str(row.get("date", "Today")),
-                "category": str(row.get("category", "Service/Product")), # Default or AI extracted
-                "description": str(row.get("description", "")),
-                "qty": float(row.get("qty", 1)),
-                "unit_price": float(row.get("unit_price", 0)),
-                "gst_pct": float(row.get("gst_pct", 5)),
-                "amount": compute_item_amount(
-                    float(row.get("qty", 1)),
-                    float(row.get("unit_price", 0)),
-                    float(row.get("gst_pct", 5)),
-                ),
-            }
+    # Normalise item keys; numeric columns are parsed once and priced as arrays
+    numeric = np.array(
+        [[_ai_number(row.get(k), d) for k, d in _AI_NUMERIC_DEFAULTS] for row in items_raw],
+        dtype=np.float64,
+    ).reshape(-1, 3)
+    qty, unit_price, gst_pct = numeric.T
+    amounts = compute_item_amount(qty, unit_price, gst_pct)
+
+    normalised_items = [
+        Item(
+            date=str(row.get("date", "Today")),
+            category=str(row.get("category", "Service/Product")), # Default or AI extracted
+            description=str(row.get("description", "")),
+            qty=q,
+            unit_price=up,
+            gst_pct=g,
+            amount=amount,
         )
+        for row, (q, up, g), amount in zip(items_raw, numeric.tolist(), amounts.tolist())
+    ]
 
     return {
         "invoice_date": parsed_data.get("invoice_date", "Today"),
         "business": business_raw,
         "staff": staff_raw,
-        "items": normalised_items
+        "items": normalised_items,
+        "degraded": repaired,
     }
+
+
+def ai_autofill_batch(
+    prompts: list[str],
+    api_key: str,
+    base_url: str = "https://api.groq.com/openai/v1",
+    poll_interval: float = 30.0,
+    timeout: float = 3600.0,
+) -> list[dict | None]:
+    """
+    Bulk variant of ai_autofill() for back-office imports, using the
+    provider's asynchronous Batch API (cheaper, no per-prompt round trip).
+    Only the final extraction step runs; there is no web-search enrichment.
+
+    Blocks until the batch finishes. Returns one result per prompt, in
+    order; entries whose request failed or returned unparseable JSON are None.
+    Raises RuntimeError if the batch itself fails, expires or is cancelled,
+    or if it hasn't finished within `timeout` seconds (it is cancelled then).
+    """
+    if not api_key or api_key.strip() == "":
+        raise RuntimeError("Please provide a valid API key in the sidebar.")
+    if not prompts:
+        return []
+
+    client = _openai_client(api_key.strip(), base_url)
+
+    lines = [
+        json.dumps({
+            "custom_id": f"req-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _parse_request(prompt),
+        })
+        for i, prompt in enumerate(prompts)
+    ]
+    batch_file = client.files.create(
+        file=("ai_autofill_batch.jsonl", "\n".join(lines).encode()),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    deadline = time.monotonic() + timeout
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            try:
+                client.batches.cancel(batch.id)
+            except Exception as e:
+                print(f"AI batch {batch.id} cancel failed: {e}", flush=True)
+            raise RuntimeError(f"AI batch {batch.id} did not finish within {timeout:g}s; cancelled.")
+        time.sleep(min(poll_interval, remaining))
+        batch = client.batches.retrieve(batch.id)
+    if batch.status != "completed":
+        raise RuntimeError(f"AI batch {batch.id} ended with status '{batch.status}'.")
+
+    results: list[dict | None] = [None] * len(prompts)
+    if not batch.output_file_id:
+        return results
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = _json_loads(line)
+        body = (record.get("response") or {}).get("body") or {}
+        try:
+            raw = body["choices"][0]["message"]["content"] or ""
+            results[int(record["custom_id"].removeprefix("req-"))] = _parse_autofill_response(raw)
+        except Exception as e:
+            print(f"AI batch item {record.get('custom_id')} failed: {e}", flush=True)
+    return results